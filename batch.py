@@ -0,0 +1,314 @@
+import os
+import sys
+import glob
+import time
+import logging
+import argparse
+import json
+import shutil
+import tempfile
+import configparser
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from core.radar.parser import RadarConfig
+from core.radar.cache import file_digest
+from core.radar.dsp import RecordingSession, stream_spectrogram, extract_gait_metrics
+from core.io.structs import df_to_session
+from core.math.filters import PipelineProcessor
+from core.math.kinematics import generate_analysis_report, summarize_timeseries
+from core.ui.theme import APP_VERSION, SETTINGS_PATH
+
+# Setup timestamped console logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s", datefmt="%H:%M:%S")
+log = logging.getLogger("Batch")
+
+# Load global configuration
+config = configparser.ConfigParser(interpolation=None)
+config.read(SETTINGS_PATH)
+
+HW_CFG_FILE = config.get('Hardware', 'radar_cfg_file', fallback='core/radar/config.cfg')
+
+
+def pool_size() -> int:
+    """Number of cores this process may actually run on (respects taskset/cgroup pinning)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Radar Batch
+# ─────────────────────────────────────────────────────────────────────────────
+
+def process_radar_file(path: str, digest: str, cfg_file: str, gate_lo: float, gate_hi: float,
+                       smooth: int, clutter_alpha: float, stream: bool) -> dict:
+    """
+    Worker: full Studio radar pipeline for one session. Never raises, errors land in the row.
+    Timings: load_s is the Parquet decode, dsp_s the spectrogram and gait_s the metrics.
+    In stream mode reading and DSP are interleaved batch by batch, so load_s is None and
+    dsp_s covers both.
+    """
+    row = {"file": path, "sha256": digest, "gate_lo_m": gate_lo, "gate_hi_m": gate_hi, "smooth_t": smooth,
+           "clutter_alpha": clutter_alpha, "error": None}
+    t_start = time.perf_counter()
+
+    try:
+        cfg = RadarConfig(cfg_file)
+
+        if stream:
+            # Bounded-memory path for multi-hour captures; the spectrogram goes to a scratch .npy
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                t_load = None
+                t_dsp_start = time.perf_counter()
+                spec, t_axis, v_axis, _ = stream_spectrogram(path, cfg, gate_lo, gate_hi, os.path.join(tmp_dir, "spec.npy"), smooth,
+                                                             clutter_alpha=clutter_alpha, upsample=1)
+                t_dsp = time.perf_counter()
+                peak_v, mean_abs, spm = extract_gait_metrics(spec, t_axis, v_axis)
+                del spec
+            n_frames = len(t_axis)
+            duration = float(t_axis[-1]) if n_frames > 1 else 0.0
+        else:
+            session = RecordingSession(path, cfg)
+            t_load = t_dsp_start = time.perf_counter()
+            spec, t_axis, v_axis, _ = session.build_spectrogram(gate_lo, gate_hi, smooth, upsample=1, clutter_alpha=clutter_alpha)
+            t_dsp = time.perf_counter()
+            peak_v, mean_abs, spm = extract_gait_metrics(spec, t_axis, v_axis)
+            n_frames, duration = session.num_frames, float(session.duration_s)
+
+        t_end = time.perf_counter()
+        row.update({
+            "frames": n_frames,
+            "duration_s": duration,
+            "fps": n_frames / duration if duration > 0 else 0.0,
+            "peak_v": peak_v,
+            "mean_abs_v": mean_abs,
+            "spm": spm,
+            "load_s": t_load - t_start if t_load is not None else None,
+            "dsp_s": t_dsp - t_dsp_start,
+            "gait_s": t_end - t_dsp,
+        })
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+
+    row["total_s"] = time.perf_counter() - t_start
+    return row
+
+
+def run_radar_batch(args):
+    """Finds every radar session under args.root and (re)processes the ones not in args.out yet."""
+    files = sorted(glob.glob(os.path.join(args.root, "**", "radar_session_*.parquet"), recursive=True))
+    if not files:
+        log.warning(f"No radar_session_*.parquet files found under {args.root}")
+        return
+
+    existing = pd.read_parquet(args.out) if os.path.exists(args.out) else pd.DataFrame()
+    if not existing.empty and "clutter_alpha" not in existing:
+        existing["clutter_alpha"] = 0.0   # Tables written before clutter suppression existed
+    workers = args.workers or pool_size()
+    log.info(f"Found {len(files)} radar sessions. Hashing with {workers} workers...")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        digests = dict(zip(files, pool.map(file_digest, files)))
+
+        # A file is done when the same content was already processed with the same parameters
+        done = set()
+        if not existing.empty:
+            ok = existing[existing["error"].isna()]
+            done = set(zip(ok["sha256"], ok["gate_lo_m"], ok["gate_hi_m"], ok["smooth_t"], ok["clutter_alpha"]))
+        todo = [f for f in files if (digests[f], args.gate_lo, args.gate_hi, args.smooth, args.clutter_alpha) not in done]
+        log.info(f"{len(files) - len(todo)} already processed, {len(todo)} to go.")
+
+        rows = []
+        t_batch = time.perf_counter()
+        futures = [pool.submit(process_radar_file, f, digests[f], args.cfg, args.gate_lo, args.gate_hi, args.smooth,
+                               args.clutter_alpha, args.stream) for f in todo]
+        for i, fut in enumerate(as_completed(futures), start=1):
+            row = fut.result()
+            rows.append(row)
+            status = f"ERROR {row['error']}" if row["error"] else f"{row['spm']:.0f} SPM in {row['total_s']:.2f}s"
+            log.info(f"[{i}/{len(todo)}] {os.path.basename(row['file'])}: {status}")
+
+    if not rows:
+        return
+
+    # Replace stale rows of re-processed files, keep everything else
+    new = pd.DataFrame(rows)
+    if not existing.empty:
+        keys = ["file", "gate_lo_m", "gate_hi_m", "smooth_t", "clutter_alpha"]
+        stale = existing.set_index(keys).index.isin(new.set_index(keys).index)
+        new = pd.concat([existing[~stale], new], ignore_index=True)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    new.sort_values("file").to_parquet(args.out, index=False)
+    log.info(f"Processed {len(rows)} sessions in {time.perf_counter() - t_batch:.1f}s -> {args.out}")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Camera Batch
+#  The cohort is a hive-partitioned dataset: <out>/summary/session=<id>/ and
+#  <out>/per_second/session=<id>/, where <id> is the file name plus a content hash
+#  prefix, so same-named recordings in different folders never share a partition.
+#  Each worker writes its own partitions, and <out>/_manifest.json remembers which
+#  file content produced them. Partitions no current manifest entry points to are pruned.
+# ─────────────────────────────────────────────────────────────────────────────
+
+CAMERA_TABLES = ("summary", "per_second")
+
+def _session_id(path: str, digest: str) -> str:
+    """Partition key: readable file name plus the first 12 hex digits of its content hash."""
+    return f"{os.path.splitext(os.path.basename(path))[0]}-{digest[:12]}"
+
+def _write_partition(df: pd.DataFrame, out_dir: str, table: str, session_id: str):
+    """Atomically replaces one session's partition of a cohort table."""
+    part_dir = os.path.join(out_dir, table, f"session={session_id}")
+    os.makedirs(part_dir, exist_ok=True)
+
+    path = os.path.join(part_dir, "part-0.parquet")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def process_camera_file(path: str, digest: str, out_dir: str, threshold: float, window: int) -> dict:
+    """Worker: Prep page cleaning + Analysis page math for one session. Never raises."""
+    session_id = _session_id(path, digest)
+    row = {"file": path, "sha256": digest, "session": session_id, "error": None}
+    t_start = time.perf_counter()
+
+    try:
+        df = pd.read_parquet(path)
+
+        # Same cleaning chain as the Data Preparation page
+        df, teleports = PipelineProcessor.remove_teleportation(df, threshold=threshold)
+        df = PipelineProcessor.repair(df)
+        df = PipelineProcessor.smooth(df, window=window)
+        t_clean = time.perf_counter()
+
+        ts_df, _ = generate_analysis_report(df_to_session(df))
+        _, df_per_sec, _, stats_df = summarize_timeseries(ts_df)
+        t_kin = time.perf_counter()
+
+        summary = stats_df.rename_axis("metric").reset_index()
+        _write_partition(summary, out_dir, "summary", session_id)
+        _write_partition(df_per_sec.drop(columns=["timestamp"]), out_dir, "per_second", session_id)
+
+        row.update({
+            "frames": len(ts_df),
+            "teleports": int(teleports),
+            "clean_s": t_clean - t_start,
+            "kinematics_s": t_kin - t_clean,
+        })
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+
+    row["total_s"] = time.perf_counter() - t_start
+    return row
+
+
+def run_camera_batch(args):
+    """Adds new or changed camera sessions under args.root to the cohort dataset in args.out."""
+    files = sorted(glob.glob(os.path.join(args.root, "**", "camera_*.parquet"), recursive=True))
+    if not files:
+        log.warning(f"No camera_*.parquet files found under {args.root}")
+        return
+
+    window = args.smooth if args.smooth % 2 != 0 else args.smooth + 1
+    params = {"threshold": args.threshold, "window": window}
+
+    manifest_path = os.path.join(args.out, "_manifest.json")
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+
+    workers = args.workers or pool_size()
+    log.info(f"Found {len(files)} camera sessions. Hashing with {workers} workers...")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        digests = dict(zip(files, pool.map(file_digest, files)))
+
+        # Reprocess when the file content or the cleaning parameters changed
+        current = {f: {"sha256": digests[f], **params, "session": _session_id(f, digests[f])} for f in files}
+        todo = [f for f in files if manifest.get(f) != current[f]]
+        log.info(f"{len(files) - len(todo)} up to date, {len(todo)} to go.")
+
+        processed = 0
+        t_batch = time.perf_counter()
+        futures = [pool.submit(process_camera_file, f, digests[f], args.out, args.threshold, window) for f in todo]
+        for i, fut in enumerate(as_completed(futures), start=1):
+            row = fut.result()
+            if row["error"]:
+                log.info(f"[{i}/{len(todo)}] {row['session']}: ERROR {row['error']}")
+                continue
+
+            manifest[row["file"]] = current[row["file"]]
+            processed += 1
+            log.info(f"[{i}/{len(todo)}] {row['session']}: {row['frames']} frames in {row['total_s']:.2f}s "
+                     f"(clean {row['clean_s']:.2f}s, kinematics {row['kinematics_s']:.2f}s)")
+
+    # Entries whose source disappeared, changed or failed to reprocess no longer describe the cohort
+    stale = [f for f in manifest if manifest[f] != current.get(f)]
+    for f in stale:
+        del manifest[f]
+    pruned = _prune_partitions(args.out, {entry["session"] for entry in manifest.values()})
+
+    if not processed and not stale and not pruned:
+        return
+
+    os.makedirs(args.out, exist_ok=True)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+    log.info(f"Processed {processed} sessions in {time.perf_counter() - t_batch:.1f}s, "
+             f"pruned {pruned} stale partitions -> {args.out}")
+
+
+def _prune_partitions(out_dir: str, keep: set[str]) -> int:
+    """Deletes every session=<id> partition whose id is not in keep. Returns how many were removed."""
+    removed = 0
+    for table in CAMERA_TABLES:
+        for part_dir in glob.glob(os.path.join(out_dir, table, "session=*")):
+            if os.path.basename(part_dir).split("=", 1)[1] not in keep:
+                shutil.rmtree(part_dir, ignore_errors=True)
+                removed += 1
+    return removed
+
+
+def main():
+    print("\n*******************************")
+    print(f"****** OST BATCH {APP_VERSION} ******")
+    print("*******************************")
+
+    parser = argparse.ArgumentParser(description="Batch-process recorded OST sessions in parallel.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_radar = sub.add_parser("radar", help="Spectrogram + gait metrics for every radar_session_*.parquet")
+    p_radar.add_argument("--root", default="records", help="Folder searched recursively for sessions")
+    p_radar.add_argument("--out", default="records/radar_metrics.parquet", help="Metrics table (updated in place)")
+    p_radar.add_argument("--cfg", default=HW_CFG_FILE, help="TI radar profile used for the recordings")
+    p_radar.add_argument("--gate-lo", type=float, default=0.0, help="Range gate start in meters")
+    p_radar.add_argument("--gate-hi", type=float, default=5.0, help="Range gate end in meters")
+    p_radar.add_argument("--smooth", type=int, default=3, help="Time smoothing window in frames")
+    p_radar.add_argument("--clutter-alpha", type=float, default=0.0, help="Static clutter map weight per frame (0 = off)")
+    p_radar.add_argument("--stream", action="store_true", help="Bounded-memory spectrogram for very long captures")
+    p_radar.add_argument("--workers", type=int, default=0, help="Process count (default: available cores)")
+    p_radar.set_defaults(func=run_radar_batch)
+
+    p_camera = sub.add_parser("camera", help="Cleaning + kinematics for every camera_*.parquet into a cohort dataset")
+    p_camera.add_argument("--root", default="records", help="Folder searched recursively for sessions")
+    p_camera.add_argument("--out", default="records/cohort", help="Partitioned cohort dataset (updated in place)")
+    p_camera.add_argument("--threshold", type=float, default=0.5, help="Teleportation distance threshold in meters")
+    p_camera.add_argument("--smooth", type=int, default=3, help="Moving average window in frames (made odd)")
+    p_camera.add_argument("--workers", type=int, default=0, help="Process count (default: available cores)")
+    p_camera.set_defaults(func=run_camera_batch)
+
+    args = parser.parse_args()
+    args.func(args)
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -63,4 +63,231 @@ def deproject_pixel_to_point(depth_intrin, px: int, py: int, depth: float):
         
     except Exception as e:
         log.debug(f"Deprojection error at pixel ({px}, {py}): {e}")
-        return None
\ No newline at end of file
+        return None
+
+# ── Batch Path ───────────────────────────────────────────────────────────────
+# One frame carries 33 landmarks. Sampling and deprojecting them one at a time costs
+# roughly 300 calls into librealsense per frame, so the batch path reads the depth
+# buffer once as a NumPy view and does the patch gather and lens math as array ops.
+
+DISTORTION_ITERS = 10   # Fixed-point iterations librealsense uses to undo Brown-Conrady
+
+def depth_buffer(depth_frame):
+    """
+    Zero-copy (H, W) uint16 view of a depth frame plus its depth units (meters per count).
+    Returns (None, 0.0) if the frame is not a depth frame.
+    """
+    try:
+        if not depth_frame.is_depth_frame():
+            return None, 0.0
+        depth_frame = depth_frame.as_depth_frame()
+        return np.asanyarray(depth_frame.get_data()), float(depth_frame.get_units())
+    except Exception as e:
+        log.debug(f"Depth buffer unavailable: {e}")
+        return None, 0.0
+
+def sample_depths(depth: np.ndarray, units: float, px, py, patch: int = 1, method: str = "mean") -> np.ndarray:
+    """
+    Batch version of get_mean_depth: the (2*patch+1)^2 neighbourhood of every (px, py) is
+    gathered with one fancy index, off-screen and zero (IR hole) pixels are ignored, and the
+    remaining values are reduced with their mean or median.
+    Returns float32 meters with NaN where a patch has no valid pixel.
+    """
+    h, w = depth.shape
+    px = np.asarray(px, dtype=np.intp)
+    py = np.asarray(py, dtype=np.intp)
+
+    dy, dx = np.mgrid[-patch:patch + 1, -patch:patch + 1]
+    xs = px[:, None] + dx.ravel()[None, :]   # (N, K) with K = (2*patch+1)^2
+    ys = py[:, None] + dy.ravel()[None, :]
+    inside = (xs >= 0) & (xs < w) & (ys >= 0) & (ys < h)
+
+    raw = depth[np.clip(ys, 0, h - 1), np.clip(xs, 0, w - 1)]
+    valid = inside & (raw > 0)
+    count = valid.sum(axis=1)
+    values = raw.astype(np.float32) * np.float32(units)
+
+    out = np.full(len(px), np.nan, dtype=np.float32)
+    has = count > 0
+    if method == "median":
+        # Invalid cells sort to the end, so the valid ones sit in [0, count) of every row
+        ordered = np.sort(np.where(valid, values, np.inf), axis=1)
+        rows = np.flatnonzero(has)
+        lo = ordered[rows, (count[rows] - 1) // 2]
+        hi = ordered[rows, count[rows] // 2]
+        out[rows] = 0.5 * (lo + hi)
+    else:
+        total = np.where(valid, values, 0.0).sum(axis=1)
+        out[has] = total[has] / count[has]
+    return out
+
+def deproject_pixels(depth_intrin, px, py, depth) -> np.ndarray:
+    """
+    Batch version of deproject_pixel_to_point: (N,) pixels and depths -> (N, 3) meters.
+    Pinhole, Brown-Conrady and inverse Brown-Conrady lenses follow librealsense's
+    rs2_deproject_pixel_to_point exactly, as array math; any other distortion model
+    falls back to the per-point librealsense call.
+    """
+    px = np.asarray(px, dtype=np.float32)
+    py = np.asarray(py, dtype=np.float32)
+    depth = np.asarray(depth, dtype=np.float32)
+
+    model = depth_intrin.model
+    if model not in (rs.distortion.none, rs.distortion.brown_conrady, rs.distortion.inverse_brown_conrady):
+        points = [deproject_pixel_to_point(depth_intrin, float(x), float(y), float(d)) for x, y, d in zip(px, py, depth)]
+        return np.array([p if p is not None else (np.nan,) * 3 for p in points], dtype=np.float32).reshape(-1, 3)
+
+    x = (px - np.float32(depth_intrin.ppx)) / np.float32(depth_intrin.fx)
+    y = (py - np.float32(depth_intrin.ppy)) / np.float32(depth_intrin.fy)
+
+    k1, k2, p1, p2, k3 = (np.float32(c) for c in depth_intrin.coeffs)
+    if model != rs.distortion.none and any(depth_intrin.coeffs):
+        xo, yo = x, y
+        for _ in range(DISTORTION_ITERS):
+            r2 = x * x + y * y
+            icdist = np.float32(1) / (np.float32(1) + ((k3 * r2 + k2) * r2 + k1) * r2)
+            # Inverse Brown-Conrady evaluates the tangential terms at the undistorted guess
+            xq, yq = (x / icdist, y / icdist) if model == rs.distortion.inverse_brown_conrady else (x, y)
+            delta_x = 2 * p1 * xq * yq + p2 * (r2 + 2 * xq * xq)
+            delta_y = 2 * p2 * xq * yq + p1 * (r2 + 2 * yq * yq)
+            x = (xo - delta_x) * icdist
+            y = (yo - delta_y) * icdist
+
+    return np.stack([depth * x, depth * y, depth], axis=1)
+
+# ── Sparse Alignment ─────────────────────────────────────────────────────────
+# rs.align warps the whole depth image into the color camera every frame, yet only the
+# landmark pixels are ever read. The sparse path leaves depth in its own camera and maps
+# just those color pixels across with the calibration, the way librealsense's
+# rs2_project_color_pixel_to_depth_pixel does, but for every landmark at once.
+
+def transform_points(extrin, points: np.ndarray) -> np.ndarray:
+    """(N, 3) points from one camera into another (rs2_transform_point_to_point, batched)."""
+    rotation = np.asarray(extrin.rotation, dtype=np.float32).reshape(3, 3)   # Column-major in librealsense
+    return points @ rotation + np.asarray(extrin.translation, dtype=np.float32)
+
+def project_points(intrin, points: np.ndarray) -> np.ndarray:
+    """(N, 3) camera-space points -> (N, 2) pixels (rs2_project_point_to_pixel, batched)."""
+    points = np.asarray(points, dtype=np.float32)
+    model = intrin.model
+    if model not in (rs.distortion.none, rs.distortion.brown_conrady,
+                     rs.distortion.inverse_brown_conrady, rs.distortion.modified_brown_conrady):
+        pixels = [rs.rs2_project_point_to_pixel(intrin, p) for p in points.tolist()]
+        return np.array(pixels, dtype=np.float32).reshape(-1, 2)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = points[:, 0] / points[:, 2]
+        y = points[:, 1] / points[:, 2]
+
+    if model != rs.distortion.none and any(intrin.coeffs):
+        k1, k2, p1, p2, k3 = (np.float32(c) for c in intrin.coeffs)
+        r2 = x * x + y * y
+        f = 1 + k1 * r2 + k2 * r2 * r2 + k3 * r2 * r2 * r2
+        if model == rs.distortion.brown_conrady:
+            # Tangential terms from the undistorted coordinates
+            dx = x * f + 2 * p1 * x * y + p2 * (r2 + 2 * x * x)
+            dy = y * f + 2 * p2 * x * y + p1 * (r2 + 2 * y * y)
+        else:
+            # Modified / inverse Brown-Conrady: tangential terms from the radially scaled ones
+            x, y = x * f, y * f
+            dx = x + 2 * p1 * x * y + p2 * (r2 + 2 * x * x)
+            dy = y + 2 * p2 * x * y + p1 * (r2 + 2 * y * y)
+        x, y = dx, dy
+
+    return np.stack([x * np.float32(intrin.fx) + np.float32(intrin.ppx),
+                     y * np.float32(intrin.fy) + np.float32(intrin.ppy)], axis=1)
+
+class SparseDepthMapper:
+    """
+    Color landmark pixels -> filtered 3D points, straight from the unaligned depth frame.
+
+    For each color pixel the depth pixel lies on a short epipolar segment (the pixel seen
+    at depth_min .. depth_max). All segments are sampled together, every candidate depth
+    pixel is reprojected into the color camera, and the one landing closest to the landmark
+    wins. Filtering is limited to the skeleton as well: a median over a small depth patch
+    replaces the full-frame spatial filter, and a per-landmark exponential average with an
+    edge threshold (like the SDK's temporal filter) replaces the full-frame temporal one.
+    """
+    def __init__(self, depth_intrin, color_intrin, depth_to_color, color_to_depth,
+                 depth_min: float = 0.1, depth_max: float = 10.0, max_steps: int = 256,
+                 patch: int = 2, alpha: float = 0.4, max_step_m: float = 0.1):
+        self.depth_intrin = depth_intrin
+        self.color_intrin = color_intrin
+        self.depth_to_color = depth_to_color
+        self.color_to_depth = color_to_depth
+        self.depth_min, self.depth_max = depth_min, depth_max
+        self.max_steps = max_steps
+        self.patch = patch
+        self.alpha = alpha
+        self.max_step_m = max_step_m
+        self._smoothed = None   # Per-landmark filtered depth (NaN = no history)
+
+    def _segments(self, px: np.ndarray, py: np.ndarray, w: int, h: int) -> tuple[np.ndarray, np.ndarray]:
+        """Start/end (N, 2) depth pixels of every landmark's search segment, clipped to the image."""
+        ends = []
+        for d in (self.depth_min, self.depth_max):
+            pts = deproject_pixels(self.color_intrin, px, py, np.full(len(px), d, dtype=np.float32))
+            ends.append(project_points(self.depth_intrin, transform_points(self.color_to_depth, pts)))
+        lo = np.array([0, 0], dtype=np.float32)
+        hi = np.array([w - 1, h - 1], dtype=np.float32)
+        return np.clip(ends[0], lo, hi), np.clip(ends[1], lo, hi)
+
+    def map_pixels(self, depth: np.ndarray, units: float, px, py) -> tuple[np.ndarray, np.ndarray]:
+        """(N,) color pixels -> (N,) depth pixel columns and rows, -1 where no depth was found."""
+        h, w = depth.shape
+        px = np.asarray(px, dtype=np.float32)
+        py = np.asarray(py, dtype=np.float32)
+        n = len(px)
+        if n == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+        start, end = self._segments(px, py, w, h)
+        length = float(np.nanmax(np.hypot(*(end - start).T)))
+        steps = int(min(self.max_steps, max(2, np.ceil(length) + 1)))
+
+        t = np.linspace(0.0, 1.0, steps, dtype=np.float32)
+        cand = start[:, None, :] + t[None, :, None] * (end - start)[:, None, :]   # (N, K, 2)
+        cand = np.nan_to_num(cand).reshape(-1, 2)
+        ix = cand[:, 0].astype(np.intp)
+        iy = cand[:, 1].astype(np.intp)
+
+        z = depth[iy, ix].astype(np.float32) * np.float32(units)
+        pts = transform_points(self.depth_to_color, deproject_pixels(self.depth_intrin, cand[:, 0], cand[:, 1], z))
+        reproj = project_points(self.color_intrin, pts).reshape(n, steps, 2)
+
+        err = (reproj[..., 0] - px[:, None]) ** 2 + (reproj[..., 1] - py[:, None]) ** 2
+        err[(z <= 0).reshape(n, steps) | ~np.isfinite(err)] = np.inf
+        best = np.argmin(err, axis=1)
+        found = np.isfinite(err[np.arange(n), best])
+
+        flat = np.arange(n) * steps + best
+        return np.where(found, ix[flat], -1), np.where(found, iy[flat], -1)
+
+    def _smooth(self, z: np.ndarray) -> np.ndarray:
+        """Per-landmark EMA that restarts on a jump larger than max_step_m (an edge or a new person)."""
+        if self._smoothed is None or self._smoothed.shape != z.shape:
+            self._smoothed = np.full(z.shape, np.nan, dtype=np.float32)
+        prev = self._smoothed
+        blend = np.isfinite(z) & np.isfinite(prev) & (np.abs(z - prev) <= self.max_step_m)
+        out = np.where(blend, prev + self.alpha * (z - prev), z)
+        self._smoothed = np.where(np.isfinite(out), out, prev)
+        return out
+
+    def reset(self):
+        self._smoothed = None
+
+    def landmark_points(self, depth: np.ndarray, units: float, px, py) -> np.ndarray:
+        """(N,) color pixels -> (N, 3) meters in the color camera frame, NaN rows where depth is missing."""
+        dx, dy = self.map_pixels(depth, units, px, py)
+        found = dx >= 0
+
+        z = np.full(len(dx), np.nan, dtype=np.float32)
+        z[found] = sample_depths(depth, units, dx[found], dy[found], patch=self.patch, method="median")
+        z = self._smooth(z)
+
+        out = np.full((len(dx), 3), np.nan, dtype=np.float32)
+        ok = np.flatnonzero(np.isfinite(z))
+        if len(ok):
+            pts = deproject_pixels(self.depth_intrin, dx[ok], dy[ok], z[ok])
+            out[ok] = transform_points(self.depth_to_color, pts)
+        return out
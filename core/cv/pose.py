@@ -1,5 +1,6 @@
 import logging
 import cv2
+import numpy as np
 import mediapipe as mp
 
 # Hook into our standard logging system
@@ -8,84 +9,139 @@ log = logging.getLogger("PoseEstimator")
 class PoseEstimator:
     """
     Mediapipe Pose Estimator with aspect-ratio preserving resize.
-    Standardizes inputs to a square (target_size) to ensure the AI 
+    Standardizes inputs to a square (target_size) to ensure the AI
     performs consistently regardless of the physical camera's aspect ratio.
+
+    Tracking mode: once a body is found, the next frame is cropped to the previous
+    landmarks' bounding box (plus margin) and inferred on a smaller track_size canvas.
+    A distant subject then fills the network input instead of a few hundred pixels of
+    a letterboxed frame. If the crop loses the body, the same frame is re-run full size.
     """
-    def __init__(self, model_complexity=1, min_conf=0.5, target_size=512):
+    def __init__(self, model_complexity=1, min_conf=0.5, target_size=512,
+                 tracking=True, track_size=256, margin=0.25, min_roi=96):
         self.target_size = target_size
+        self.track_size = track_size
+        self.tracking = tracking
+        self.margin = margin
+        self.min_roi = min_roi
         self.mp_pose = mp.solutions.pose
-        
-        # Initialize the heavy AI model in memory
-        self.pose = self.mp_pose.Pose(
-            static_image_mode=False, # False = Video mode (uses tracking across frames for speed)
-            model_complexity=model_complexity,
-            min_detection_confidence=min_conf,
-            min_tracking_confidence=min_conf
-        )
 
-    def _resize_with_pad(self, img):
-        """Resizes the image to target_size (square) while maintaining aspect ratio (Letterboxing)."""
+        def make_model():
+            return self.mp_pose.Pose(
+                static_image_mode=False, # False = Video mode (uses tracking across frames for speed)
+                model_complexity=model_complexity,
+                min_detection_confidence=min_conf,
+                min_tracking_confidence=min_conf
+            )
+
+        # Initialize the heavy AI model in memory. The crop path gets its own instance,
+        # since MediaPipe's internal tracking assumes consecutive images share one framing.
+        self.pose = make_model()
+        self.pose_roi = make_model() if tracking else None
+
+        # Letterbox canvases are allocated once and overwritten in place every frame
+        self._canvas = np.zeros((target_size, target_size, 3), dtype=np.uint8)
+        self._canvas_roi = np.zeros((track_size, track_size, 3), dtype=np.uint8)
+        self._roi = None   # (x0, y0, x1, y1) crop for the next frame, None = full frame
+
+    @staticmethod
+    def _letterbox(img, canvas):
+        """
+        Resizes the image into the square canvas while maintaining aspect ratio (Letterboxing).
+        The resize writes straight into the canvas, only the padding strips are cleared, and the
+        BGR -> RGB swap runs in place on the canvas instead of on the full camera frame.
+        """
         h, w = img.shape[:2]
-        
-        # Find the scale factor that fits the largest dimension into our target_size
-        scale = self.target_size / max(h, w)
-        nh, nw = int(h * scale), int(w * scale)
+        size = canvas.shape[0]
 
-        # Resize the actual image data
-        resized = cv2.resize(img, (nw, nh), interpolation=cv2.INTER_LINEAR)
+        # Find the scale factor that fits the largest dimension into the canvas
+        scale = size / max(h, w)
+        nh, nw = max(1, int(h * scale)), max(1, int(w * scale))
 
         # Calculate how much black padding is needed to make it a perfect square
-        top = (self.target_size - nh) // 2
-        bottom = self.target_size - nh - top
-        left = (self.target_size - nw) // 2
-        right = self.target_size - nw - left
-
-        # Add the black borders
-        padded = cv2.copyMakeBorder(resized, top, bottom, left, right,
-                                    borderType=cv2.BORDER_CONSTANT, value=(0,0,0))
-
-        return padded, scale, left, top
-
-    def _restore_coords(self, landmarks, scale, pad_x, pad_y):
-        """Maps normalized AI landmarks back to the original HD camera pixels."""
-        restored = []
-        for lm in landmarks:
-            # MediaPipe returns normalized coordinates (0.0 to 1.0) based on the padded image.
-            # 1. Multiply by target_size to get the exact pixel coordinate in the padded image.
-            # 2. Subtract the padding to get the pixel coordinate in the resized image.
-            # 3. Divide by scale to stretch it back up to the original image size.
-            x = (lm.x * self.target_size - pad_x) / scale
-            y = (lm.y * self.target_size - pad_y) / scale
-            z = lm.z / scale     
-            
-            restored.append((x, y, z))
-            
-        return restored
+        top = (size - nh) // 2
+        left = (size - nw) // 2
+
+        canvas[:top] = 0
+        canvas[top + nh:] = 0
+        canvas[top:top + nh, :left] = 0
+        canvas[top:top + nh, left + nw:] = 0
+        cv2.resize(img, (nw, nh), dst=canvas[top:top + nh, left:left + nw], interpolation=cv2.INTER_LINEAR)
+
+        # MediaPipe requires RGB, but OpenCV uses BGR
+        cv2.cvtColor(canvas, cv2.COLOR_BGR2RGB, dst=canvas)
+        return scale, left, top
+
+    def _restore_coords(self, landmarks, scale, pad_x, pad_y, size=None, offset=(0, 0)):
+        """
+        Maps normalized AI landmarks back to the original HD camera pixels.
+        Returns a (33, 3) float array of (x, y, z).
+        """
+        size = self.target_size if size is None else size
+        lm = np.array([(p.x, p.y, p.z) for p in landmarks], dtype=np.float64)
+
+        # MediaPipe returns normalized coordinates (0.0 to 1.0) based on the padded canvas.
+        # 1. Multiply by the canvas size to get the exact pixel coordinate in the padded image.
+        # 2. Subtract the padding to get the pixel coordinate in the resized image.
+        # 3. Divide by scale to stretch it back up to the crop, then shift by the crop origin.
+        out = np.empty_like(lm)
+        out[:, 0] = (lm[:, 0] * size - pad_x) / scale + offset[0]
+        out[:, 1] = (lm[:, 1] * size - pad_y) / scale + offset[1]
+        out[:, 2] = lm[:, 2] * size / (scale * self.target_size)   # Same units as a full-frame pass
+        return out
+
+    def _next_roi(self, coords, w, h):
+        """Square crop around the landmarks with margin, clipped to the frame; None if it is the frame."""
+        x0, y0 = coords[:, :2].min(axis=0)
+        x1, y1 = coords[:, :2].max(axis=0)
+        side = max(x1 - x0, y1 - y0, self.min_roi) * (1.0 + 2.0 * self.margin)
+        if side >= 0.9 * max(w, h):
+            return None
+
+        cx, cy = (x0 + x1) / 2.0, (y0 + y1) / 2.0
+        rx0, ry0 = int(max(0, cx - side / 2)), int(max(0, cy - side / 2))
+        rx1, ry1 = int(min(w, cx + side / 2)), int(min(h, cy + side / 2))
+        if rx1 - rx0 < 2 or ry1 - ry0 < 2:
+            return None
+        return rx0, ry0, rx1, ry1
+
+    def _infer(self, model, img, canvas, offset=(0, 0)):
+        """Letterbox -> inference -> restored (33, 3) coordinates, or None."""
+        # 1. Pre-process (Resize & Pad)
+        scale, pad_x, pad_y = self._letterbox(img, canvas)
+
+        # 2. Inference (Feed it to the Neural Network)
+        results = model.process(canvas)
+        if not results.pose_landmarks:
+            return None
+
+        # 3. Post-process (Restore Coordinates back to raw Camera Space)
+        return self._restore_coords(
+            results.pose_landmarks.landmark,
+            scale, pad_x, pad_y, canvas.shape[0], offset
+        )
 
     def estimate(self, image):
         """
-        Takes a raw camera frame and returns a list of (x, y, z) tuples in the ORIGINAL image pixels.
+        Takes a raw camera frame and returns a (33, 3) array of (x, y, z) in the ORIGINAL image pixels.
         Returns None if no human body is detected.
         """
         try:
-            # MediaPipe requires RGB, but OpenCV uses BGR. By converting here, 
-            # we avoid wasting CPU time converting the pure black padding borders later.
-            img_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            
-            # 1. Pre-process (Resize & Pad)
-            img_padded, scale, pad_x, pad_y = self._resize_with_pad(img_rgb)
-            
-            # 2. Inference (Feed it to the Neural Network)
-            results = self.pose.process(img_padded)
-            if not results.pose_landmarks:
-                return None
-
-            # 3. Post-process (Restore Coordinates back to raw Camera Space)
-            return self._restore_coords(
-                results.pose_landmarks.landmark, 
-                scale, pad_x, pad_y
-            )
+            h, w = image.shape[:2]
+            coords = None
+
+            if self.tracking and self._roi is not None:
+                x0, y0, x1, y1 = self._roi
+                coords = self._infer(self.pose_roi, image[y0:y1, x0:x1], self._canvas_roi, (x0, y0))
+
+            # Tracking lost (or not started): full-frame detection
+            if coords is None:
+                coords = self._infer(self.pose, image, self._canvas)
+
+            self._roi = self._next_roi(coords, w, h) if (coords is not None and self.tracking) else None
+            return coords
 
         except Exception as e:
             log.error(f"MediaPipe inference failed: {e}")
-            return None
\ No newline at end of file
+            self._roi = None
+            return None
@@ -0,0 +1,83 @@
+import threading
+from collections import deque
+
+
+class LatestMailbox:
+    """
+    Single-slot, latest-frame-wins handoff between a producer thread and a consumer.
+    put() never blocks: a frame the consumer has not taken yet is overwritten and counted
+    as dropped, so a slow consumer sees bounded latency and memory instead of a growing queue.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self.received = 0   # Frames offered by the producer
+        self.dropped = 0    # Frames overwritten before anyone took them
+        self.taken = 0      # Frames handed to the consumer
+
+    def put(self, item):
+        with self._cond:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = item
+            self.received += 1
+            self._cond.notify()
+
+    def take(self, timeout: float | None = 0.0):
+        """
+        Returns the newest frame and empties the slot, or None if nothing arrived.
+        timeout=0 polls (UI timers), a positive timeout waits that long, None waits forever.
+        """
+        with self._cond:
+            if self._item is None and timeout != 0.0:
+                self._cond.wait_for(lambda: self._item is not None, timeout)
+            item, self._item = self._item, None
+            if item is not None:
+                self.taken += 1
+            return item
+
+    def stats(self) -> tuple[int, int, int]:
+        """(received, taken, dropped) counters, read consistently."""
+        with self._cond:
+            return self.received, self.taken, self.dropped
+
+class FrameQueue:
+    """
+    Bounded FIFO handoff that never drops: put() waits for room instead (backpressure).
+    Used where every frame matters, e.g. ahead of the recording stage, so a slow consumer
+    slows its producer down rather than losing data. Same take()/stats() as LatestMailbox.
+    """
+    def __init__(self, maxsize: int = 8):
+        self._cond = threading.Condition()
+        self._items = deque()
+        self.maxsize = max(1, maxsize)
+        self.received = 0
+        self.dropped = 0    # Always 0, kept so both handoffs report alike
+        self.taken = 0
+
+    def put(self, item, timeout: float | None = None) -> bool:
+        """Appends item, waiting up to timeout for room. Returns False if it timed out."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: len(self._items) < self.maxsize, timeout):
+                return False
+            self._items.append(item)
+            self.received += 1
+            self._cond.notify_all()
+            return True
+
+    def take(self, timeout: float | None = 0.0):
+        """Returns the oldest frame, or None if nothing arrived (same timeout rules as LatestMailbox)."""
+        with self._cond:
+            if not self._items and timeout != 0.0:
+                self._cond.wait_for(lambda: bool(self._items), timeout)
+            if not self._items:
+                return None
+            self.taken += 1
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def stats(self) -> tuple[int, int, int]:
+        """(received, taken, dropped) counters, read consistently."""
+        with self._cond:
+            return self.received, self.taken, self.dropped
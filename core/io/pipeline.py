@@ -0,0 +1,162 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+
+from core.io.mailbox import LatestMailbox, FrameQueue
+
+# Hook into our standard logging system
+log = logging.getLogger("Pipeline")
+
+@dataclass
+class Packet:
+    """One captured frame travelling down the pipeline. Stages add their results to data."""
+    timestamp: float                    # Wall-clock capture time, never rewritten downstream
+    data: dict = field(default_factory=dict)
+
+# ── 1. Stage Threads ─────────────────────────────────────────────────────────
+
+class Stage(threading.Thread):
+    """
+    One pipeline step on its own thread: take the newest packet from the inbox, run fn,
+    hand the result to the next stage's inbox. A source stage has no inbox and calls fn()
+    with no argument. fn returning None means "nothing to pass on" (no frame, no person...).
+    Busy time is accumulated per reporting interval so stats() shows what each step costs.
+    A failing fn is logged with its traceback at most once every ERROR_LOG_S and otherwise
+    only counted (see FramePipeline.report), so a persistent fault such as an unplugged
+    camera does not flood the log at frame rate. A failing source stage also backs off
+    (doubling from ERROR_BACKOFF_S up to ERROR_BACKOFF_MAX_S) instead of spinning a core,
+    since nothing upstream paces it.
+    """
+    ERROR_LOG_S = 10.0
+    ERROR_BACKOFF_S = 0.05
+    ERROR_BACKOFF_MAX_S = 2.0
+
+    def __init__(self, name: str, fn, inbox, outbox, stop_event: threading.Event):
+        super().__init__(name=f"stage-{name}", daemon=True)
+        self.stage_name = name
+        self.fn = fn
+        self.inbox = inbox
+        self.outbox = outbox
+        self.stop_event = stop_event
+
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.errors = 0
+        self._last_error_log = -float("inf")
+        self._consecutive_errors = 0
+        self._interval = [0, 0.0, 0.0]   # frames, busy seconds, worst frame seconds
+        self.latency_s = 0.0             # Capture -> end of this stage, for the newest packet
+
+    def run(self):
+        while not self.stop_event.is_set():
+            if self.inbox is not None:
+                item = self.inbox.take(timeout=0.1)
+                if item is None: continue
+
+            t0 = time.perf_counter()
+            try:
+                out = self.fn(item) if self.inbox is not None else self.fn()
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+                now = time.monotonic()
+                if now - self._last_error_log >= self.ERROR_LOG_S:
+                    self._last_error_log = now
+                    log.exception(f"Stage '{self.stage_name}' failed ({self.errors} failures so far)")
+                self._consecutive_errors += 1
+                if self.inbox is None:
+                    backoff = self.ERROR_BACKOFF_S * 2 ** min(self._consecutive_errors - 1, 16)
+                    self.stop_event.wait(min(backoff, self.ERROR_BACKOFF_MAX_S))
+                continue
+            self._consecutive_errors = 0
+            busy = time.perf_counter() - t0
+
+            if out is None: continue
+            with self._lock:
+                self.processed += 1
+                frames, total, worst = self._interval
+                self._interval = [frames + 1, total + busy, max(worst, busy)]
+                self.latency_s = time.time() - out.timestamp
+
+            if isinstance(self.outbox, FrameQueue):
+                # Lossless hop: wait for room, but keep an eye on shutdown
+                while not self.outbox.put(out, timeout=0.1):
+                    if self.stop_event.is_set(): return
+            elif self.outbox is not None:
+                self.outbox.put(out)
+
+    def snapshot(self) -> tuple[int, float, float, float, int]:
+        """(frames, busy_s, worst_s, latency_s) since the previous snapshot, plus the total error count."""
+        with self._lock:
+            frames, total, worst = self._interval
+            self._interval = [0, 0.0, 0.0]
+            return frames, total, worst, self.latency_s, self.errors
+
+# ── 2. The Pipeline ──────────────────────────────────────────────────────────
+
+class FramePipeline:
+    """
+    Chain of stages connected by single-slot latest-wins mailboxes.
+    Every stage works on a different frame at the same time, so throughput is set by the
+    slowest stage instead of the sum of all of them, and a slow stage drops stale frames
+    at its inbox instead of building up a queue (and latency) behind it.
+    Stages named in `lossless` get a bounded FrameQueue inbox instead: nothing is dropped
+    there, and a slow stage pushes back on the one before it.
+    """
+    def __init__(self, source: tuple[str, object], stages: list[tuple[str, object]],
+                 lossless: tuple[str, ...] = (), queue_size: int = 8):
+        self.stop_event = threading.Event()
+        self.stages = []
+
+        inbox = None
+        chain = [source] + stages
+        for i, (name, fn) in enumerate(chain):
+            nxt = chain[i + 1][0] if i + 1 < len(chain) else None
+            outbox = FrameQueue(queue_size) if nxt in lossless else LatestMailbox()
+            self.stages.append(Stage(name, fn, inbox, outbox, self.stop_event))
+            inbox = outbox
+        self.stages[-1].outbox = None   # Last stage is the sink
+        self._mark = time.perf_counter()
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+
+    def stop(self, timeout: float = 2.0):
+        self.stop_event.set()
+        for stage in self.stages:
+            stage.join(timeout)
+
+    def is_alive(self) -> bool:
+        return all(stage.is_alive() for stage in self.stages)
+
+    def stats(self) -> list[dict]:
+        """Per-stage rate, mean/worst busy time, frames dropped at its inbox, errors and capture latency."""
+        now = time.perf_counter()
+        dt = max(now - self._mark, 1e-6)
+        self._mark = now
+
+        rows = []
+        for stage in self.stages:
+            frames, busy, worst, latency, errors = stage.snapshot()
+            dropped = stage.inbox.stats()[2] if stage.inbox is not None else 0
+            rows.append({
+                "stage": stage.stage_name,
+                "fps": frames / dt,
+                "mean_ms": 1e3 * busy / frames if frames else 0.0,
+                "max_ms": 1e3 * worst,
+                "dropped": dropped,
+                "latency_ms": 1e3 * latency,
+                "errors": errors,
+            })
+        return rows
+
+    def report(self) -> str:
+        """One log line summarizing stats()."""
+        rows = self.stats()
+        return " | ".join(
+            f"{r['stage']} {r['fps']:.1f} FPS {r['mean_ms']:.1f}/{r['max_ms']:.1f} ms ({r['dropped']} dropped"
+            + (f", {r['errors']} errors)" if r['errors'] else ")")
+            for r in rows
+        ) + f" | latency {rows[-1]['latency_ms']:.0f} ms"
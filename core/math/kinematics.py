@@ -163,4 +163,37 @@ def generate_analysis_report(session):
     
     df_stats = df_timeseries.drop(columns=['timestamp', 'frame']).describe()
     
-    return df_timeseries, df_stats
\ No newline at end of file
+    return df_timeseries, df_stats
+
+# ── 4. Time Rollups ──────────────────────────────────────────────────────────
+
+def summarize_timeseries(ts_df: pd.DataFrame):
+    """
+    Rolls a per-frame timeseries up to seconds and minutes and builds the summary table
+    (describe() of the per-second data plus a linear trend per minute for every metric).
+    Returns: (ts_df, df_per_sec, df_per_min, stats_df)
+    """
+    ts_df['time_sec'] = np.floor(ts_df['timestamp']).astype(int)
+    numeric_cols = [c for c in ts_df.columns if c not in ['frame', 'time_sec', 'timestamp']]
+    
+    df_per_sec = ts_df.groupby('time_sec')[numeric_cols].mean().reset_index()
+    df_per_sec['timestamp'] = df_per_sec['time_sec']
+    
+    ts_df['time_min'] = np.floor(ts_df['timestamp'] / 60.0).astype(int)
+    df_per_min = ts_df.groupby('time_min')[numeric_cols].mean().reset_index()
+    df_per_min['timestamp'] = df_per_min['time_min']
+    
+    # Fatigue trend: slope of each metric against time in minutes
+    trend_metrics = {}
+    if len(df_per_sec) > 1:
+        x_mins = df_per_sec['time_sec'] / 60.0
+        for col in numeric_cols:
+            mask = ~np.isnan(df_per_sec[col])
+            if mask.sum() > 1:
+                slope, _ = np.polyfit(x_mins[mask], df_per_sec[col][mask], 1)
+                trend_metrics[f"slope_{col}"] = slope
+
+    stats_df = df_per_sec.drop(columns=['time_sec', 'timestamp', 'time_min'], errors='ignore').describe().T
+    stats_df['trend/min'] = stats_df.index.map(lambda x: trend_metrics.get(f"slope_{x}", 0.0))
+
+    return ts_df, df_per_sec, df_per_min, stats_df
@@ -0,0 +1,113 @@
+import os
+import hashlib
+import logging
+import numpy as np
+
+from core.radar.parser import RadarConfig
+
+log = logging.getLogger("RadarCache")
+
+# ── 1. Content Hashing ───────────────────────────────────────────────────────
+
+def bytes_digest(data: bytes) -> str:
+    """SHA-256 of an in-memory upload (e.g. a Streamlit file buffer)."""
+    return hashlib.sha256(data).hexdigest()
+
+def file_digest(path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file on disk, read in 1 MB blocks so huge sessions never sit in RAM."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+# ── 2. The Cube Cache ────────────────────────────────────────────────────────
+
+class CubeCache:
+    """
+    Disk cache of decoded (Time, Range, Velocity) radar cubes stored as .npy files.
+    Entries are keyed by the recording's content hash plus the radar profile that
+    shaped the decode, and are handed back as read-only memory maps.
+    When the folder grows past max_bytes, the least recently used entries are deleted.
+    """
+    def __init__(self, root: str = "cache/radar", max_bytes: int = 2 * 1024**3):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def _key(self, digest: str, cfg: RadarConfig) -> str:
+        # Any change to the profile changes how the raw bytes are reshaped, so it is part of the key
+        params = f"{digest}|{cfg.numRangeBins}|{cfg.numLoops}|{cfg.rangeRes:.9g}|{cfg.dopRes:.9g}|{cfg.T}"
+        return hashlib.sha256(params.encode()).hexdigest()[:32]
+
+    def _paths(self, key: str) -> tuple[str, str]:
+        return os.path.join(self.root, f"{key}.cube.npy"), os.path.join(self.root, f"{key}.ts.npy")
+
+    def get(self, digest: str, cfg: RadarConfig) -> tuple[np.ndarray, np.ndarray] | None:
+        """Returns (memory-mapped cube, timestamps) on a hit, otherwise None."""
+        cube_path, ts_path = self._paths(self._key(digest, cfg))
+        if not (os.path.exists(cube_path) and os.path.exists(ts_path)):
+            return None
+
+        try:
+            cube = np.load(cube_path, mmap_mode="r")
+            timestamps = np.load(ts_path)
+        except (OSError, ValueError) as e:
+            # Half-written or corrupted entry: drop it and decode again
+            log.warning(f"Discarding unreadable cache entry {cube_path}: {e}")
+            self._remove(cube_path, ts_path)
+            return None
+
+        # Touch the entry so eviction sees it as recently used
+        for path in (cube_path, ts_path):
+            os.utime(path)
+        return cube, timestamps
+
+    def put(self, digest: str, cfg: RadarConfig, cube: np.ndarray, timestamps: np.ndarray) -> np.ndarray:
+        """Stores a decoded cube and returns it re-opened as a memory map."""
+        cube_path, ts_path = self._paths(self._key(digest, cfg))
+
+        # Write under a temporary name first so a crash never leaves a truncated entry behind
+        for path, arr in ((ts_path, timestamps), (cube_path, cube)):
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, np.ascontiguousarray(arr))
+            os.replace(tmp_path, path)
+
+        self._evict(keep=cube_path)
+        return np.load(cube_path, mmap_mode="r")
+
+    # ── 3. LRU Eviction ──────────────────────────────────────────────────────
+
+    def _evict(self, keep: str):
+        """Deletes the least recently used entries until the cache fits in max_bytes."""
+        entries, total = [], 0
+        for name in os.listdir(self.root):
+            if not name.endswith(".cube.npy"):
+                continue
+            cube_path = os.path.join(self.root, name)
+            ts_path = cube_path[:-len(".cube.npy")] + ".ts.npy"
+            try:
+                size = os.path.getsize(cube_path) + (os.path.getsize(ts_path) if os.path.exists(ts_path) else 0)
+                entries.append((os.path.getmtime(cube_path), size, cube_path, ts_path))
+                total += size
+            except OSError:
+                continue
+
+        for _, size, cube_path, ts_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if cube_path == keep:
+                continue
+            self._remove(cube_path, ts_path)
+            total -= size
+            log.info(f"Evicted {os.path.basename(cube_path)} ({size / 1e6:.1f} MB)")
+
+    @staticmethod
+    def _remove(*paths: str):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                # On Windows a file that is still memory-mapped cannot be deleted yet
+                pass
@@ -0,0 +1,106 @@
+import numpy as np
+
+from core.radar.parser import RadarConfig
+
+# ── 1. Summed-Area Tables ────────────────────────────────────────────────────
+
+def _box_sums(sat: np.ndarray, half_r: int, half_v: int, pad_r: int, pad_v: int, nr: int, nv: int) -> np.ndarray:
+    """
+    Sum of every (2*half_r+1) x (2*half_v+1) box centred on the original cells,
+    read from a (Time, Range+1, Velocity+1) summed-area table in four lookups.
+    """
+    r0, r1 = pad_r - half_r, pad_r + half_r + 1
+    v0, v1 = pad_v - half_v, pad_v + half_v + 1
+    return (sat[:, r1:r1 + nr, v1:v1 + nv] - sat[:, r0:r0 + nr, v1:v1 + nv]
+            - sat[:, r1:r1 + nr, v0:v0 + nv] + sat[:, r0:r0 + nr, v0:v0 + nv])
+
+def _rows_in_window(nr: int, half_r: int) -> np.ndarray:
+    """How many real range rows each window covers (fewer at the edges of the heatmap)."""
+    r = np.arange(nr)
+    return (np.minimum(r + half_r, nr - 1) - np.maximum(r - half_r, 0) + 1).astype(np.float64)
+
+# ── 2. The Detector ──────────────────────────────────────────────────────────
+
+class CFARDetector:
+    """
+    2-D Cell-Averaging CFAR over Range-Doppler heatmaps.
+    Every cell is compared against the mean of a rectangular ring of training cells
+    (train bins beyond guard bins on each side). Box sums come from a summed-area
+    table, so a frame costs O(Range x Velocity) whatever the window size.
+    The Doppler axis wraps around (it is an FFT), the range axis does not: edge cells
+    simply average over fewer training cells.
+    The threshold factor N * (pfa^(-1/N) - 1) gives the requested false alarm rate for
+    square-law (power) cells; on RDHM magnitudes it acts as a relative threshold.
+    """
+    def __init__(self, cfg: RadarConfig, guard: tuple[int, int] = (2, 2), train: tuple[int, int] = (4, 4),
+                 pfa: float = 1e-3, chunk_frames: int = 1024):
+        self.cfg = cfg
+        self.guard_r, self.guard_v = guard
+        self.outer_r, self.outer_v = guard[0] + train[0], guard[1] + train[1]
+        self.pfa = pfa
+        self.chunk_frames = chunk_frames
+
+        nv = cfg.numLoops
+        if 2 * self.outer_v + 1 > nv:
+            raise ValueError(f"CFAR window ({2 * self.outer_v + 1} Doppler bins) is wider than the heatmap ({nv}).")
+
+        # Bin centres, so detections land in the middle of the heatmap cell they came from
+        self.r_axis = cfg.range_axis()
+        self.v_axis = cfg.velocity_axis()
+        self._shift = (np.arange(nv) + nv // 2) % nv   # Raw Doppler bin -> fftshifted column
+        self._setup_for = None
+
+    def _setup(self, nr: int):
+        """Training cell counts and threshold factors only depend on the number of range rows."""
+        n_train = (_rows_in_window(nr, self.outer_r) * (2 * self.outer_v + 1)
+                   - _rows_in_window(nr, self.guard_r) * (2 * self.guard_v + 1))
+        self._n_train = n_train[:, np.newaxis]
+        self._scale = (n_train * (self.pfa ** (-1.0 / n_train) - 1.0))[:, np.newaxis]
+        self._setup_for = nr
+
+    def threshold_map(self, cube: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized core for a (Time, Range, Velocity) stack in raw FFT order.
+        Returns (cells as float64, detection threshold per cell).
+        """
+        x = np.asarray(cube, dtype=np.float64)
+        nt, nr, nv = x.shape
+        if self._setup_for != nr:
+            self._setup(nr)
+
+        # Zero rows above/below the heatmap, wrapped columns left/right of it
+        pr, pv = self.outer_r, self.outer_v
+        padded = np.pad(x, ((0, 0), (pr, pr), (0, 0)))
+        padded = np.concatenate([padded[:, :, nv - pv:], padded, padded[:, :, :pv]], axis=2)
+
+        sat = np.zeros((nt, nr + 2 * pr + 1, nv + 2 * pv + 1), dtype=np.float64)
+        np.cumsum(padded, axis=1, out=sat[:, 1:, 1:])
+        np.cumsum(sat[:, 1:, 1:], axis=2, out=sat[:, 1:, 1:])
+
+        train_sum = (_box_sums(sat, self.outer_r, self.outer_v, pr, pv, nr, nv)
+                     - _box_sums(sat, self.guard_r, self.guard_v, pr, pv, nr, nv))
+        return x, self._scale * (train_sum / self._n_train)
+
+    def detect(self, frame: np.ndarray) -> np.ndarray:
+        """Detections of one (Range, Velocity) frame. See detect_batch for the columns."""
+        return self.detect_batch(frame[np.newaxis])[0]
+
+    def detect_batch(self, cube: np.ndarray) -> list[np.ndarray]:
+        """
+        Runs CFAR over a (Time, Range, Velocity) cube (raw FFT order, e.g. RecordingSession.frames),
+        chunked along time to bound memory.
+        Returns one float32 array per frame with columns [range_m, velocity_m_s, snr_db].
+        """
+        out = []
+        for a in range(0, len(cube), self.chunk_frames):
+            x, thresh = self.threshold_map(cube[a:a + self.chunk_frames])
+            t_idx, r_idx, v_idx = np.nonzero(x > thresh)
+
+            # Threshold is scale * noise, so the SNR is measured against the noise estimate itself
+            noise = thresh[t_idx, r_idx, v_idx] / self._scale[r_idx, 0]
+            snr_db = 10.0 * np.log10(x[t_idx, r_idx, v_idx] / np.maximum(noise, 1e-12))
+
+            dets = np.column_stack([self.r_axis[r_idx], self.v_axis[self._shift[v_idx]], snr_db]).astype(np.float32)
+            bounds = np.searchsorted(t_idx, np.arange(1, len(x)))
+            out.extend(np.split(dets, bounds))
+        return out
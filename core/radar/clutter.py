@@ -0,0 +1,71 @@
+import numpy as np
+from scipy.signal import lfilter
+
+# Smallest residual we hand back. RDHM cells are integer counts, so one count is
+# the quantization floor and maps to 0 dB instead of log10(0) = -inf.
+RESIDUAL_FLOOR = 1.0
+
+# ── 1. Static Clutter Map ────────────────────────────────────────────────────
+
+class ClutterMap:
+    """
+    Exponentially weighted background estimate for every (Range, Doppler) cell.
+    Walls, the treadmill frame and the runner's mean torso return barely change from
+    frame to frame, so they converge into the map and are subtracted away, while the
+    swinging limbs stay in the residual.
+    alpha is the per-frame update weight: the map forgets with a time constant of
+    roughly 1 / (alpha * frame_rate) seconds (0.02 @ 15 FPS ~ 3.3 s).
+    The live (update) and offline (update_batch) forms share the same state and give
+    identical results, so a recording can be processed in chunks of any size.
+    """
+    def __init__(self, alpha: float = 0.02):
+        if not 0.0 < alpha <= 1.0:
+            raise ValueError(f"Clutter alpha must be in (0, 1], got {alpha}")
+        self.alpha = float(alpha)
+        self.background = None
+
+    def reset(self):
+        self.background = None
+
+    def update(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Live form: O(Range x Velocity) per frame.
+        Returns the clutter-free residual of one (Range, Velocity) frame, then folds it into the map.
+        """
+        frame = np.asarray(frame, dtype=np.float32)
+        if self.background is None or self.background.shape != frame.shape:
+            # The first frame defines the background, so the stream starts fully suppressed
+            self.background = frame.copy()
+
+        residual = np.maximum(frame - self.background, RESIDUAL_FLOOR)
+
+        # In place: background += alpha * (frame - background)
+        self.background *= np.float32(1.0 - self.alpha)
+        self.background += np.float32(self.alpha) * frame
+        return residual
+
+    def update_batch(self, frames: np.ndarray) -> np.ndarray:
+        """
+        Offline form for a (Time, ...) stack of frames.
+        The recursion b[t] = (1 - alpha) * b[t-1] + alpha * x[t] is a first-order IIR filter,
+        so lfilter runs it along the time axis for every cell at once (no per-frame Python loop).
+        Each frame is compared with the background *before* it was updated, exactly like update().
+        """
+        frames = np.asarray(frames, dtype=np.float32)
+        if len(frames) == 0:
+            return frames.copy()
+        if self.background is None or self.background.shape != frames.shape[1:]:
+            self.background = frames[0].copy()
+
+        a = np.float32(self.alpha)
+        zi = (np.float32(1.0) - a) * self.background[np.newaxis]
+        trail, _ = lfilter([a], [np.float32(1.0), a - np.float32(1.0)], frames, axis=0, zi=zi)
+        trail = trail.astype(np.float32, copy=False)
+
+        # Background seen by frame t is the one left behind by frame t-1
+        prev = np.empty_like(trail)
+        prev[0] = self.background
+        prev[1:] = trail[:-1]
+
+        self.background = trail[-1].copy()
+        return np.maximum(frames - prev, RESIDUAL_FLOOR, out=prev)
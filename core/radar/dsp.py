@@ -1,10 +1,15 @@
+import os
 import logging
 import numpy as np
+import pyarrow as pa
 import pyarrow.parquet as pq
 import scipy.ndimage as ndimage
-from scipy.signal import butter, filtfilt, find_peaks
+from scipy.signal import butter, filtfilt, find_peaks, lfilter, lfilter_zi, ss2tf
 
 from core.radar.parser import RadarConfig
+from core.radar.cache import CubeCache, file_digest
+from core.radar.clutter import ClutterMap
+from core.radar.lut import DecibelLUT
 
 # Setup clean logging
 log = logging.getLogger("RadarMath")
@@ -21,44 +26,289 @@ def butter_bandpass_filter(data, lowcut, highcut, fs, order=4):
     b, a = butter(order, [lowcut / nyq, highcut / nyq], btype='band')
     return filtfilt(b, a, data)
 
-# ── 2. The Data Session ──────────────────────────────────────────────────────
+# ── 2. Bulk RDHM Decoding ────────────────────────────────────────────────────
+
+def decode_rdhm(column, num_range_bins: int, num_loops: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Turns an Arrow binary column of raw RDHM bytes into a (Time, Range, Velocity) uint16 cube.
+    Works directly on the Arrow offsets/data buffers, so no Python bytes objects are created.
+    Returns the cube and the boolean mask of rows that had the expected frame size.
+    """
+    exp_bytes = num_range_bins * num_loops * 2
+    chunks = column.chunks if isinstance(column, pa.ChunkedArray) else [column]
+
+    parts, masks = [], []
+    for arr in chunks:
+        if not (pa.types.is_binary(arr.type) or pa.types.is_large_binary(arr.type)):
+            arr = arr.cast(pa.large_binary())
+
+        # Binary arrays are [validity bitmap, offsets, data]. Offsets are int64 for large_binary.
+        _, off_buf, data_buf = arr.buffers()
+        off_dtype = np.int64 if pa.types.is_large_binary(arr.type) else np.int32
+        offsets = np.frombuffer(off_buf, dtype=off_dtype)[arr.offset : arr.offset + len(arr) + 1]
+        data = np.frombuffer(data_buf, dtype=np.uint8) if data_buf is not None else np.empty(0, np.uint8)
+
+        # Drop corrupted packets where the network dropped bytes (and nulls) with one vectorized mask
+        lengths = np.diff(offsets)
+        valid = lengths == exp_bytes
+        if arr.null_count:
+            valid &= arr.is_valid().to_numpy(zero_copy_only=False)
+        masks.append(valid)
+
+        if not valid.any():
+            continue
+
+        raw = data[offsets[0]:offsets[-1]]
+        # Clean chunk: keep a zero-copy view. Dirty chunk: expand the row mask to a byte mask.
+        parts.append(raw if valid.all() else raw[np.repeat(valid, lengths)])
+
+    # The only copy of the cube: Parquet row groups are stitched together once
+    flat = parts[0] if len(parts) == 1 else (np.concatenate(parts) if parts else np.empty(0, np.uint8))
+    cube = flat.view(np.uint16).reshape(-1, num_range_bins, num_loops)
+    mask = np.concatenate(masks) if masks else np.zeros(0, dtype=bool)
+    return cube, mask
+
+# ── 3. Range-Max Index ───────────────────────────────────────────────────────
+
+class RangeMaxIndex:
+    """
+    Block-max index over the Range axis of a (Time, Range, Velocity) cube.
+    The range bins are split into blocks of BLOCK bins, and a sparse table is kept over the
+    block maxima: level k holds the max over every run of 2^k consecutive blocks. A gate
+    [lo, hi) is then the max of two overlapping level-k slices for the whole blocks inside it
+    plus at most BLOCK bins read straight from the cube at each edge: O(T x V x BLOCK) per
+    gate instead of O(T x R x V). Levels are built lazily, only up to the widest gate requested.
+    Memory bound: the table adds at most (1 + log2(R / BLOCK)) / BLOCK of the cube on top of
+    it (half the cube for 64 range bins), where a table over raw bins would grow to log2(R)
+    full copies and stay alive for as long as the session is cached.
+    The fftshift along Velocity commutes with a max over Range, so the raw cube is indexed
+    and the caller shifts the small (T, V) result.
+    """
+    BLOCK = 8
+
+    def __init__(self, cube: np.ndarray):
+        self.cube = cube
+        self.num_range_bins = cube.shape[1]
+        self.num_blocks = self.num_range_bins // self.BLOCK
+        full = cube[:, :self.num_blocks * self.BLOCK]
+        self.levels = [full.reshape(cube.shape[0], self.num_blocks, self.BLOCK, cube.shape[2]).max(axis=2)]
+
+    def _ensure_level(self, k: int):
+        while len(self.levels) <= k:
+            prev = self.levels[-1]
+            half = 1 << (len(self.levels) - 1)
+            n = self.num_blocks - 2 * half + 1
+            self.levels.append(np.maximum(prev[:, :n], prev[:, half:half + n]))
+
+    def query(self, lo_bin, hi_bin) -> np.ndarray:
+        """
+        Max over range bins [lo_bin, hi_bin). Scalars gate every frame the same way;
+        arrays of length T give each frame its own gate. Returns a (Time, Velocity) array.
+        """
+        B = self.BLOCK
+        if np.isscalar(lo_bin) and np.isscalar(hi_bin):
+            lo, hi = int(lo_bin), int(hi_bin)
+            # Edges straight from the cube; they overlap the whole blocks, which a max doesn't mind
+            out = np.maximum(self.cube[:, lo:min(hi, lo + B)].max(axis=1),
+                             self.cube[:, max(lo, hi - B):hi].max(axis=1))
+            bl, bh = -(-lo // B), hi // B   # Whole blocks [bl, bh) inside the gate
+            if bh > bl:
+                k = (bh - bl).bit_length() - 1
+                self._ensure_level(k)
+                lvl = self.levels[k]
+                np.maximum(out, np.maximum(lvl[:, bl], lvl[:, bh - (1 << k)]), out=out)
+            return out
+
+        lo = np.broadcast_to(np.asarray(lo_bin, dtype=np.intp), (self.cube.shape[0],))
+        hi = np.broadcast_to(np.asarray(hi_bin, dtype=np.intp), lo.shape)
+        t_all = np.arange(lo.size)
+
+        # Edges: BLOCK gathers from each side, indices clamped into the gate
+        out = self.cube[t_all, lo].copy()
+        for j in range(B):
+            np.maximum(out, self.cube[t_all, np.minimum(lo + j, hi - 1)], out=out)
+            np.maximum(out, self.cube[t_all, np.maximum(hi - 1 - j, lo)], out=out)
+
+        # Whole blocks: frames are grouped by level (at most log2(R / BLOCK) groups)
+        bl, bh = -(-lo // B), hi // B
+        has_blocks = bh > bl
+        if has_blocks.any():
+            ks = np.full(lo.shape, -1, dtype=np.intp)
+            ks[has_blocks] = np.floor(np.log2(bh[has_blocks] - bl[has_blocks])).astype(np.intp)
+            self._ensure_level(int(ks.max()))
+            for k in np.unique(ks[has_blocks]):
+                t = np.flatnonzero(ks == k)
+                lvl = self.levels[k]
+                out[t] = np.maximum(out[t], np.maximum(lvl[t, bl[t]], lvl[t, bh[t] - (1 << k)]))
+        return out
+
+# ── 4. Spectrogram Building Blocks ───────────────────────────────────────────
+# Every step below works row by row (or on a fixed ceiling), so the in-RAM path and
+# the chunked streaming path produce the same numbers.
+
+UPSAMPLE_FACTOR = 8   # Velocity zoom factor applied to the final spectrogram
+
+def _moving_bins_mask(nv: int) -> np.ndarray:
+    """True for every Doppler bin except the three stationary-clutter bins around 0 m/s."""
+    mask = np.ones(nv, dtype=bool)
+    center_idx = nv // 2
+    mask[center_idx-1:center_idx+2] = False
+    return mask
+
+def _velocity_centroid(spec_lin: np.ndarray, v_axis: np.ndarray) -> np.ndarray:
+    """Power-weighted mean velocity of every row above that row's 30th percentile noise floor."""
+    noise_lin = np.percentile(spec_lin, 30, axis=1, keepdims=True)
+    weights = np.maximum(spec_lin - noise_lin, 0.0)
+    w_sum = weights.sum(axis=1)
+    
+    # Prevent divide-by-zero errors if a frame is completely silent
+    num = (weights * v_axis[np.newaxis, :]).sum(axis=1)
+    return np.divide(num, w_sum, out=np.zeros_like(num), where=w_sum > 1e-9).astype(np.float32)
+
+def _clip_clutter(spec_db: np.ndarray, ceiling: float):
+    """Caps the 0 m/s bins (in place) so walls and the treadmill don't blind the heatmap."""
+    center_idx = spec_db.shape[1] // 2
+    np.clip(spec_db[:, center_idx-1:center_idx+2], a_min=None, a_max=ceiling, out=spec_db[:, center_idx-1:center_idx+2])
+
+def upsample_velocity(spec_db: np.ndarray, dop_max: float, factor: int = UPSAMPLE_FACTOR) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Cubic zoom along Velocity only. Each row is interpolated independently of its neighbours,
+    so any time slice (a chunk, a display tile) can be upsampled on its own.
+    The axis runs between the first and last native bins (RadarConfig.velocity_axis),
+    which is where zoom places the corner samples; factor=1 gives the native axis itself.
+    """
+    cell = 2.0 * dop_max / spec_db.shape[1]
+    v_axis = np.linspace(-dop_max, dop_max - cell, spec_db.shape[1] * factor, dtype=np.float32)
+    if factor == 1:
+        return spec_db, v_axis
+    return ndimage.zoom(spec_db, (1, factor), order=3), v_axis
+
+def _gate_bins(gate_lo_m, gate_hi_m, cfg: RadarConfig):
+    """Meters -> [lo_bin, hi_bin) range indices. Scalars give ints, per-frame arrays give index arrays."""
+    if np.isscalar(gate_lo_m) and np.isscalar(gate_hi_m):
+        lo_bin = max(0, int(gate_lo_m / cfg.rangeRes))
+        return lo_bin, min(cfg.numRangeBins, max(lo_bin + 1, int(gate_hi_m / cfg.rangeRes)))
+
+    lo_bin = np.maximum(0, (np.asarray(gate_lo_m) / cfg.rangeRes).astype(np.intp))
+    hi_bin = np.minimum(cfg.numRangeBins, np.maximum(lo_bin + 1, (np.asarray(gate_hi_m) / cfg.rangeRes).astype(np.intp)))
+    return lo_bin, hi_bin
+
+def range_blocks(lo_m: float, hi_m: float, block_m: float, cfg: RadarConfig) -> list[tuple[float, float]]:
+    """Splits [lo_m, hi_m) into back-to-back gates of about block_m, aligned to whole range bins."""
+    lo_bin, hi_bin = _gate_bins(lo_m, hi_m, cfg)
+    step = max(1, int(round(block_m / cfg.rangeRes)))
+    edges = list(range(lo_bin, hi_bin, step)) + [hi_bin]
+    # Half a bin inside each edge so the meters -> bins conversion lands on the same bins again
+    return [((a + 0.5) * cfg.rangeRes, (b + 0.5) * cfg.rangeRes) for a, b in zip(edges[:-1], edges[1:])]
+
+def _gate_clutter_free(clutter: ClutterMap, cube: np.ndarray, lo_bin, hi_bin, span: tuple[int, int] | None = None) -> np.ndarray:
+    """
+    Range-gated max of a chunk of frames after background subtraction.
+    Per-frame gates (arrays matching the chunk) need the fixed row span the clutter map
+    covers; rows outside each frame's own gate are masked out before the max.
+    The residual is rounded back to uint16 RDHM counts, so everything downstream
+    (histograms, dB conversion) treats it exactly like a raw gated slice.
+    """
+    row_lo, row_hi = span if span is not None else (lo_bin, hi_bin)
+    residual = clutter.update_batch(cube[:, row_lo:row_hi, :])
+    if not np.isscalar(lo_bin):
+        rows = np.arange(row_lo, row_hi)
+        outside = (rows < lo_bin[:, np.newaxis]) | (rows >= hi_bin[:, np.newaxis])
+        residual[outside] = 0.0
+    return np.rint(residual.max(axis=1)).astype(np.uint16)
+
+def _kalman_track(z: np.ndarray, dt: float, accel_std: float, meas_std: float) -> np.ndarray:
+    """
+    Smooths a per-frame position measurement with a constant-velocity Kalman filter.
+    With fixed noise levels the Kalman gain converges to the alpha-beta gains given by
+    the Kalata tracking index, and the filter becomes linear time-invariant. Written in
+    state-space form and converted to a 2nd-order IIR (ss2tf), it runs as one lfilter call.
+    """
+    lam = accel_std * dt ** 2 / meas_std
+    root = np.sqrt(lam ** 2 + 8.0 * lam)
+    alpha = -(lam ** 2 + 8.0 * lam - (lam + 4.0) * root) / 8.0
+    beta = (lam ** 2 + 4.0 * lam - lam * root) / 4.0
+
+    F = np.array([[1.0, dt], [0.0, 1.0]])
+    K = np.array([[alpha], [beta / dt]])
+    H = np.array([[1.0, 0.0]])
+
+    # x[k] = (I - K H) F x[k-1] + K z[k]; the output reads the updated position
+    A = (np.eye(2) - K @ H) @ F
+    b, a = ss2tf(A, K, H @ A, H @ K)
+
+    # Start settled on the first measurement instead of ramping up from 0 m
+    track, _ = lfilter(b[0], a, z, zi=lfilter_zi(b[0], a) * z[0])
+    return track
+
+def _hist_percentile_db(hist: np.ndarray, q: float, eps: float = 1e-9) -> float:
+    """
+    np.percentile(20*log10(x + eps), q) for uint16 samples x given only their 65536-bin histogram.
+    dB is monotonic in x, so the order statistics are exact and only the interpolation happens in dB.
+    """
+    n = int(hist.sum())
+    cum = np.cumsum(hist)
+    rank = q / 100.0 * (n - 1)
+    lo = int(np.floor(rank))
+    v_lo = int(np.searchsorted(cum, lo, side='right'))
+    v_hi = int(np.searchsorted(cum, min(lo + 1, n - 1), side='right'))
+    db_lo, db_hi = 20.0 * np.log10(np.array([v_lo, v_hi], dtype=np.float32) + np.float32(eps))
+    return float(db_lo + (rank - lo) * (db_hi - db_lo))
+
+# ── 5. The Data Session ──────────────────────────────────────────────────────
 
 class RecordingSession:
     """
     Loads raw radar bytes from disk, structures them based on the TI hardware
     profile, and processes them into a Micro-Doppler Spectrogram.
     """
-    def __init__(self, filepath: str, cfg: RadarConfig):
+    def __init__(self, filepath: str | None, cfg: RadarConfig, cache: CubeCache | None = None):
         self.filepath = filepath
         self.cfg = cfg
-        self.frames: list[np.ndarray] = []
-        self.timestamps: list[float] = []
+        self.cache = cache
+        self.frames = np.empty((0, cfg.numRangeBins, cfg.numLoops), dtype=np.uint16)  # (Time, Range, Velocity)
+        self.timestamps = np.empty(0, dtype=np.float64)
+        self._range_index = None
         
         # Automatically load the data into RAM on instantiation
-        self._load()
+        if filepath is not None:
+            self._load()
+
+    @classmethod
+    def from_cube(cls, frames: np.ndarray, timestamps: np.ndarray, cfg: RadarConfig):
+        """Wraps an already decoded cube (e.g. a memory map from the CubeCache) without touching Parquet."""
+        session = cls(None, cfg)
+        session.frames = frames
+        session.timestamps = np.asarray(timestamps, dtype=np.float64)
+        return session
 
     def _load(self):
         """Loads and extracts raw Range-Doppler Heatmap (RDHM) matrices from Parquet."""
-        table = pq.read_table(self.filepath)
-        df = table.to_pandas()
-        
-        # Calculate exactly how many values should be in a single radar frame
-        exp = self.cfg.numRangeBins * self.cfg.numLoops
-        
-        # Bypassing pandas iterrows() entirely by converting columns to native Python lists. 
-        # This runs roughly 50x faster than standard Pandas iteration.
-        byte_list = df['rdhm_bytes'].to_list()
-        timestamp_list = df['timestamp'].to_list()
+        digest = None
+        if self.cache is not None:
+            digest = file_digest(self.filepath)
+            hit = self.cache.get(digest, self.cfg)
+            if hit is not None:
+                self.frames, self.timestamps = hit
+                return
+
+        table = pq.read_table(self.filepath, columns=['timestamp', 'rdhm_bytes'])
         
-        for raw_bytes, ts in zip(byte_list, timestamp_list):
-            raw = np.frombuffer(raw_bytes, dtype=np.uint16)
-            
-            # Drop corrupted packets where the network dropped bytes
-            if raw.size != exp: continue
-                
-            mat = raw.astype(np.float32).reshape(self.cfg.numRangeBins, self.cfg.numLoops)
-            self.frames.append(mat)
-            self.timestamps.append(float(ts))
+        # OPTIMIZATION: The frames stay as raw uint16 in one contiguous cube.
+        # Float conversion only happens later on the range-gated slice.
+        self.frames, valid = decode_rdhm(table.column('rdhm_bytes'), self.cfg.numRangeBins, self.cfg.numLoops)
+        self.timestamps = table.column('timestamp').to_numpy()[valid].astype(np.float64)
+
+        if self.cache is not None:
+            # Swap the RAM copy for the memory-mapped one so the page cache can share it
+            self.frames = self.cache.put(digest, self.cfg, self.frames, self.timestamps)
+
+    @property
+    def range_index(self) -> RangeMaxIndex:
+        """Built on first use and kept for the life of the session, so re-gating is cheap."""
+        if self._range_index is None or self._range_index.cube is not self.frames:
+            self._range_index = RangeMaxIndex(self.frames)
+        return self._range_index
 
     @property
     def num_frames(self): 
@@ -68,99 +318,316 @@ class RecordingSession:
     def duration_s(self):
         return (self.timestamps[-1] - self.timestamps[0]) if len(self.timestamps) > 1 else 0.0
 
-    # ── 3. The DSP Engine ────────────────────────────────────────────────────
+    # ── 6. The DSP Engine ────────────────────────────────────────────────────
 
-    def build_spectrogram(self, gate_lo_m: float, gate_hi_m: float, smooth_t: int = 2):
+    def build_spectrogram(self, gate_lo_m: float, gate_hi_m: float, smooth_t: int = 2, upsample: int = 1,
+                          clutter_alpha: float = 0.0, chunk_frames: int = 4096):
         """
         Converts the 3D Radar Data (Time, Range, Velocity) into 
         2D Spectrogram Data (Time, Velocity) by collapsing the Range axis.
+        clutter_alpha > 0 subtracts a per-cell static clutter map (see ClutterMap) before gating.
         """
         cfg = self.cfg
         nv = cfg.numLoops
         
-        # Convert the user's requested meters into strict array indices (Range Gating)
-        lo_bin = max(0, int(gate_lo_m / cfg.rangeRes))
-        hi_bin = min(cfg.numRangeBins, max(lo_bin + 1, int(gate_hi_m / cfg.rangeRes)))
+        # Convert the user's requested meters into strict array indices (Range Gating).
+        # Arrays of length Time give every frame its own gate (see track_subject).
+        lo_bin, hi_bin = _gate_bins(gate_lo_m, gate_hi_m, cfg)
 
-        v_axis_coarse = np.linspace(-cfg.dopMax, cfg.dopMax, nv, dtype=np.float32)
+        v_axis_coarse = cfg.velocity_axis()
 
-        # OPTIMIZATION: 3D Matrix Vectorization. 
-        # Instead of looping through thousands of frames one by one, we stack them 
-        # into a single 3D cube and perform the math on the entire cube instantly in C.
-        frames_3d = np.array(self.frames) # Shape: (Time, Range, Velocity)
+        # 1. Collapse the Range axis by taking the max signal inside the gate
+        if clutter_alpha > 0:
+            # The background differs per range cell, so it has to come off before the max.
+            # Chunked along time to keep the float residuals small.
+            clutter = ClutterMap(clutter_alpha)
+            span = (int(np.min(lo_bin)), int(np.max(hi_bin)))
+            per_frame = not np.isscalar(lo_bin)
+            sl_3d = np.empty((self.num_frames, nv), dtype=np.uint16)
+            for a in range(0, self.num_frames, chunk_frames):
+                gate = (lo_bin[a:a + chunk_frames], hi_bin[a:a + chunk_frames]) if per_frame else (lo_bin, hi_bin)
+                sl_3d[a:a + chunk_frames] = _gate_clutter_free(clutter, self.frames[a:a + chunk_frames], *gate, span=span)
+        else:
+            # OPTIMIZATION: Range-Max Index. 
+            # Instead of re-scanning every range bin of the cube for each new gate, the sparse
+            # table answers the max over [lo_bin, hi_bin) from two precomputed slices.
+            sl_3d = self.range_index.query(lo_bin, hi_bin) # Shape: (Time, Velocity)
         
-        # 1. Slice the ranges we care about, then collapse the Range axis by taking the max signal
-        sl_3d = frames_3d[:, lo_bin:hi_bin, :].max(axis=1) # Shape becomes: (Time, Velocity)
-        
-        # 2. Shift the FFT so 0 m/s is in the exact center of the matrix
-        spec_lin = np.abs(np.fft.fftshift(sl_3d, axes=1))
+        # 2. Shift the FFT so 0 m/s is in the exact center of the matrix (float only from here on)
+        spec_lin = np.fft.fftshift(sl_3d, axes=1).astype(np.float32)
 
         # Centroid extraction (Calculates the power-weighted average velocity of the runner)
-        noise_lin = np.percentile(spec_lin, 30, axis=1, keepdims=True)
-        weights = np.maximum(spec_lin - noise_lin, 0.0)
-        w_sum = weights.sum(axis=1)
-        
-        # Prevent divide-by-zero errors if a frame is completely silent
-        centroid = np.where(w_sum > 1e-9, (weights * v_axis_coarse[np.newaxis, :]).sum(axis=1) / w_sum, 0.0).astype(np.float32)
+        centroid = _velocity_centroid(spec_lin, v_axis_coarse)
 
-        # Convert the linear radar amplitudes into Logarithmic Decibels (dB) for human viewing
-        spec_db = 20.0 * np.log10(spec_lin + 1e-9)
+        # Convert the linear radar amplitudes into Logarithmic Decibels (dB) for human viewing.
+        # The gate max is still uint16, so this is one gather through the shared dB table.
+        spec_db = DecibelLUT(nv).convert(sl_3d)
         
         # Clutter Mitigation: The center bins represent exactly 0 m/s velocity. 
         # This is stationary clutter (walls, the treadmill itself). 
         # We cap the brightness of the center bins so they don't blind the heatmap.
-        center_idx = nv // 2
-        moving_bins_db = np.delete(spec_db, [center_idx-1, center_idx, center_idx+1], axis=1)
-        clutter_ceiling = np.percentile(moving_bins_db, 99.0)
-        spec_db[:, center_idx-1:center_idx+2] = np.clip(spec_db[:, center_idx-1:center_idx+2], a_min=None, a_max=clutter_ceiling)
+        clutter_ceiling = np.percentile(spec_db[:, _moving_bins_mask(nv)], 99.0)
+        _clip_clutter(spec_db, clutter_ceiling)
 
         # Time Smoothing: Blurs the image slightly along the Time axis to remove micro-jitters
         if smooth_t > 1:
             spec_db = ndimage.uniform_filter1d(spec_db, size=smooth_t, axis=0)
 
         # Upsampling: Radars usually only have 32 or 64 velocity bins. 
-        # We use bilinear interpolation to stretch it to 256/512 bins so it doesn't look blocky.
-        zoom_factor = 8
-        spec_db = ndimage.zoom(spec_db, (1, zoom_factor), order=3)
-        v_axis_highres = np.linspace(-cfg.dopMax, cfg.dopMax, nv * zoom_factor, dtype=np.float32)
+        # We use cubic interpolation to stretch it to 256/512 bins so it doesn't look blocky.
+        # Native bins by default, which is what the gait metrics expect; pass upsample=UPSAMPLE_FACTOR
+        # only for a display copy (the Studio upsamples just the visible tile instead).
+        spec_db, v_axis_highres = upsample_velocity(spec_db, cfg.dopMax, upsample)
 
         # Normalize the timestamps so the recording starts exactly at 0.0s
-        t0 = self.timestamps[0]
-        t_axis = np.array([t - t0 for t in self.timestamps], dtype=np.float32)
+        t_axis = (self.timestamps - self.timestamps[0]).astype(np.float32)
 
         return spec_db, t_axis, v_axis_highres, centroid
 
-# ── 4. Gait Extraction ───────────────────────────────────────────────────────
+    def track_subject(self, search_lo_m: float, search_hi_m: float, accel_std: float = 0.5, meas_std: float = 0.3) -> np.ndarray:
+        """
+        Per-frame range (meters) of the runner inside the search region, for a gate that follows them.
+        Each frame's raw estimate is the range bin with the most moving (non-zero Doppler) energy,
+        found for all frames at once with one argmax; the Kalman filter then removes the bin-to-bin
+        jumps. accel_std (m/s^2) is how hard the subject may drift, meas_std (m) how noisy the argmax is.
+        """
+        cfg = self.cfg
+        lo_bin, hi_bin = _gate_bins(search_lo_m, search_hi_m, cfg)
+
+        # The stationary bins sit at the edges of the raw (unshifted) Doppler axis
+        static = np.flatnonzero(np.fft.ifftshift(~_moving_bins_mask(cfg.numLoops)))
+        region = self.frames[:, lo_bin:hi_bin, :]
+        energy = region.sum(axis=2, dtype=np.uint32) - region[:, :, static].sum(axis=2, dtype=np.uint32)
+        z = (lo_bin + np.argmax(energy, axis=1) + 0.5) * cfg.rangeRes
+
+        if len(z) < 2:
+            return z
+        dt = float(np.median(np.diff(self.timestamps))) if len(self.timestamps) > 1 else 0.0
+        if dt <= 0:
+            dt = 1.0 / cfg.frameRate
+        return np.clip(_kalman_track(z, dt, accel_std, meas_std), lo_bin * cfg.rangeRes, hi_bin * cfg.rangeRes)
+
+    def build_spectrogram_stack(self, gates: list[tuple[float, float]], smooth_t: int = 2, upsample: int = 1,
+                                clutter_alpha: float = 0.0, chunk_frames: int = 4096):
+        """
+        One spectrogram per range gate, so people (or a person and a moving object) at
+        different distances stay apart instead of merging in a single max over range.
+        Back-to-back gates (see range_blocks) are collapsed together by one maximum.reduceat
+        pass over the cube; any other gate list is answered gate by gate from the range index.
+        Every gate goes through exactly the same steps as build_spectrogram.
+        Returns (stack_db (Gates, Time, Velocity), t_axis, v_axis, centroids (Gates, Time)).
+        """
+        cfg = self.cfg
+        nv = cfg.numLoops
+        v_axis_coarse = cfg.velocity_axis()
+
+        bins = np.array([_gate_bins(lo, hi, cfg) for lo, hi in gates], dtype=np.intp)
+        contiguous = bool(np.all(bins[1:, 0] == bins[:-1, 1]))
+        row_lo, row_hi = int(bins[:, 0].min()), int(bins[:, 1].max())
+
+        def collapse(block: np.ndarray) -> np.ndarray:
+            """(Time, rows from row_lo, Velocity) -> (Time, Gates, Velocity)"""
+            if contiguous:
+                return np.maximum.reduceat(block, bins[:, 0] - row_lo, axis=1)
+            return np.stack([block[:, lo - row_lo:hi - row_lo].max(axis=1) for lo, hi in bins], axis=1)
+
+        # 1. Collapse the Range axis inside every gate
+        if clutter_alpha > 0:
+            clutter = ClutterMap(clutter_alpha)
+            gated = np.empty((self.num_frames, len(bins), nv), dtype=np.uint16)
+            for a in range(0, self.num_frames, chunk_frames):
+                residual = clutter.update_batch(self.frames[a:a + chunk_frames, row_lo:row_hi, :])
+                gated[a:a + chunk_frames] = np.rint(collapse(residual))
+        elif contiguous:
+            gated = collapse(self.frames[:, row_lo:row_hi, :])
+        else:
+            gated = np.stack([self.range_index.query(lo, hi) for lo, hi in bins], axis=1)
+
+        # 2. Gates first, 0 m/s centred
+        stack_raw = np.ascontiguousarray(np.fft.fftshift(gated, axes=2).transpose(1, 0, 2))
+        n_gates, n_frames = stack_raw.shape[:2]
+
+        # Row-wise steps run on the (Gates x Time, Velocity) view in one call
+        centroids = _velocity_centroid(stack_raw.reshape(-1, nv).astype(np.float32), v_axis_coarse).reshape(n_gates, n_frames)
+        stack_db = DecibelLUT(nv, shift=False).convert(stack_raw)
+
+        # Clutter ceiling per gate, applied to all gates at once
+        ceilings = np.percentile(stack_db[:, :, _moving_bins_mask(nv)], 99.0, axis=(1, 2))
+        center_idx = nv // 2
+        center = stack_db[:, :, center_idx-1:center_idx+2]
+        np.minimum(center, ceilings[:, np.newaxis, np.newaxis].astype(np.float32), out=center)
+
+        if smooth_t > 1:
+            stack_db = ndimage.uniform_filter1d(stack_db, size=smooth_t, axis=1)
+
+        stack_db, v_axis_highres = upsample_velocity(stack_db.reshape(-1, nv), cfg.dopMax, upsample)
+        t_axis = (self.timestamps - self.timestamps[0]).astype(np.float32)
+        return stack_db.reshape(n_gates, n_frames, -1), t_axis, v_axis_highres, centroids
+
+# ── 7. Streaming Spectrogram ─────────────────────────────────────────────────
+
+def stream_spectrogram(filepath: str, cfg: RadarConfig, gate_lo_m: float, gate_hi_m: float,
+                       out_path: str, smooth_t: int = 2, batch_frames: int = 2048, clutter_alpha: float = 0.0,
+                       upsample: int = 1):
+    """
+    Same output as RecordingSession.build_spectrogram, but never holds the cube in RAM.
+    Pass 1 streams Parquet batches, range-gates each one and spills the small (Time, Velocity)
+    slice to disk while a 65536-bin histogram tracks the clutter ceiling percentile.
+    Pass 2 re-reads that slice in chunks (with a halo of rows so the time smoothing is
+    seamless across chunk edges) and writes the finished spectrogram to out_path as .npy.
+    Peak memory is roughly batch_frames x Range x Velocity, whatever the recording length.
+    Returns (memory-mapped spec_db, t_axis, v_axis, centroid).
+    """
+    nv = cfg.numLoops
+    lo_bin, hi_bin = _gate_bins(gate_lo_m, gate_hi_m, cfg)
+    v_axis_coarse = cfg.velocity_axis()
+    moving = _moving_bins_mask(nv)
+    clutter = ClutterMap(clutter_alpha) if clutter_alpha > 0 else None
+
+    # ── Pass 1: Gate, histogram and centroid per batch ──
+    hist = np.zeros(65536, dtype=np.int64)
+    centroids, timestamps = [], []
+    gated_path = f"{out_path}.gated.tmp"
+    
+    with open(gated_path, "wb") as gated_file:
+        for batch in pq.ParquetFile(filepath).iter_batches(batch_size=batch_frames, columns=['timestamp', 'rdhm_bytes']):
+            cube, valid = decode_rdhm(batch.column('rdhm_bytes'), cfg.numRangeBins, nv)
+            if not valid.any():
+                continue
+
+            gated = _gate_clutter_free(clutter, cube, lo_bin, hi_bin) if clutter is not None else cube[:, lo_bin:hi_bin, :].max(axis=1)
+            gated = np.fft.fftshift(gated, axes=1)
+            hist += np.bincount(gated[:, moving].ravel(), minlength=65536)
+            centroids.append(_velocity_centroid(gated.astype(np.float32), v_axis_coarse))
+            timestamps.append(batch.column('timestamp').to_numpy()[valid])
+            gated_file.write(np.ascontiguousarray(gated).tobytes())
+
+    try:
+        if not timestamps:
+            raise ValueError(f"No valid radar frames found in {filepath}")
+
+        timestamps = np.concatenate(timestamps).astype(np.float64)
+        centroid = np.concatenate(centroids)
+        n_frames = timestamps.size
+        clutter_ceiling = _hist_percentile_db(hist, 99.0)
+
+        # ── Pass 2: dB, clutter clip, smoothing and upsampling per chunk ──
+        to_db = DecibelLUT(nv, shift=False)   # The spilled slice is already fftshifted
+        gated_all = np.memmap(gated_path, dtype=np.uint16, mode='r', shape=(n_frames, nv))
+        spec_out = np.lib.format.open_memmap(out_path, mode='w+', dtype=np.float32, shape=(n_frames, nv * upsample))
+
+        # uniform_filter1d looks size//2 rows back and (size-1)//2 rows ahead
+        halo_lo, halo_hi = (smooth_t // 2, (smooth_t - 1) // 2) if smooth_t > 1 else (0, 0)
+        for a in range(0, n_frames, batch_frames):
+            b = min(n_frames, a + batch_frames)
+            lo, hi = max(0, a - halo_lo), min(n_frames, b + halo_hi)
+
+            spec_db = to_db.convert(gated_all[lo:hi])
+            _clip_clutter(spec_db, clutter_ceiling)
+            if smooth_t > 1:
+                spec_db = ndimage.uniform_filter1d(spec_db, size=smooth_t, axis=0)
+
+            spec_out[a:b], v_axis_highres = upsample_velocity(spec_db[a - lo : a - lo + (b - a)], cfg.dopMax, upsample)
+
+        spec_out.flush()
+        del spec_out, gated_all
+    finally:
+        if os.path.exists(gated_path):
+            os.remove(gated_path)
+
+    t_axis = (timestamps - timestamps[0]).astype(np.float32)
+    return np.load(out_path, mmap_mode='r'), t_axis, v_axis_highres, centroid
+
+# ── 8. Gait Extraction ───────────────────────────────────────────────────────
+
+def _movement_signal(spec: np.ndarray) -> np.ndarray:
+    """
+    Collapses the native-resolution spectrogram into a 1D limb-motion wave (one sample per frame).
+    We completely ignore the center stationary bins. We only want the kinetic 
+    energy of the runner's limbs swinging forward and backward.
+    """
+    movement = np.sum(spec[:, _moving_bins_mask(spec.shape[1])], axis=1)
+    
+    # Clean the 1D movement wave
+    movement = np.clip(movement, a_min=None, a_max=np.percentile(movement, 99.5))
+    return (movement - np.mean(movement)) / (np.std(movement) + 1e-6)
+
+def _subbin_peak(profiles: np.ndarray, v_axis: np.ndarray) -> np.ndarray:
+    """
+    Velocity of each (..., Velocity) profile's maximum, refined between bins by a parabola
+    through the peak and its two neighbours. This replaces the 8x cubic zoom the gait
+    metrics used to run on, without materializing an upsampled spectrogram.
+    """
+    k = np.argmax(profiles, axis=-1)
+    k_in = np.clip(k, 1, profiles.shape[-1] - 2)
+    a = np.take_along_axis(profiles, (k_in - 1)[..., None], axis=-1)[..., 0]
+    b = np.take_along_axis(profiles, k_in[..., None], axis=-1)[..., 0]
+    c = np.take_along_axis(profiles, (k_in + 1)[..., None], axis=-1)[..., 0]
+    denom = a - 2 * b + c
+    offset = np.divide(0.5 * (a - c), denom, out=np.zeros_like(denom, dtype=np.float64), where=np.abs(denom) > 1e-12)
+    offset = np.where(k == k_in, np.clip(offset, -0.5, 0.5), 0.0)   # Edge bins stay on the bin
+    return v_axis[k] + offset * float(v_axis[1] - v_axis[0])
+
+def _crossing_velocity(profiles: np.ndarray, thresh: np.ndarray, v_axis: np.ndarray, from_top: bool) -> np.ndarray:
+    """Outermost velocity where each profile rises to thresh, linearly interpolated between bins."""
+    above = profiles >= thresh
+    if from_top:
+        profiles, above, v_axis = profiles[:, ::-1], above[:, ::-1], v_axis[::-1]
+    rows = np.arange(len(profiles))
+    i = np.argmax(above, axis=1)
+    i_prev = np.maximum(i - 1, 0)
+    y0, y1 = profiles[rows, i_prev], profiles[rows, i]
+    th = thresh[:, 0]
+    frac = np.divide(th - y0, y1 - y0, out=np.ones_like(th, dtype=np.float64), where=(i > 0) & (y1 > y0))
+    return v_axis[i_prev] + np.clip(frac, 0.0, 1.0) * (v_axis[i] - v_axis[i_prev])
+
+def _window_means(spec: np.ndarray, starts: np.ndarray, win: int, chunk_frames: int = 4096) -> np.ndarray:
+    """
+    (len(starts), Velocity) mean of spec over every [start, start + win) window.
+    The running sum is built chunk by chunk and only the rows at window edges are kept,
+    so memory stays at one chunk plus the profiles, however long the recording.
+    """
+    edges = np.concatenate([starts, starts + win])
+    order = np.argsort(edges, kind="stable")
+    sorted_edges = edges[order]
+    kept = np.empty((len(edges), spec.shape[1]), dtype=np.float64)
+
+    running = np.zeros(spec.shape[1], dtype=np.float64)
+    j = 0
+    for a in range(0, spec.shape[0] + 1, chunk_frames):
+        b = min(spec.shape[0], a + chunk_frames)
+        block = np.cumsum(spec[a:b], axis=0, dtype=np.float64)
+        block += running
+        # Edge e needs the sum of rows [0, e): row e-1 of the running sum (0 for e == 0)
+        while j < len(sorted_edges) and sorted_edges[j] <= b:
+            e = sorted_edges[j]
+            kept[order[j]] = block[e - a - 1] if e > a else running
+            j += 1
+        if b > a:
+            running = block[-1]
+    n = len(starts)
+    return (kept[n:] - kept[:n]) / win
 
 def extract_gait_metrics(spec: np.ndarray, t_axis: np.ndarray, v_axis: np.ndarray) -> tuple[float, float, float]:
     """
     Analyzes the Micro-Doppler signature to automatically detect the runner's Cadence (SPM)
-    and their physical velocity.
+    and their physical velocity. Expects the native-resolution spectrogram (upsample=1);
+    the peak velocity is interpolated between bins instead.
     """
     # 1. Base Velocity Metrics
-    profile = spec.mean(axis=0)
+    profile = spec.mean(axis=0, dtype=np.float64)
     noise_floor = float(np.percentile(profile, 20))
     weights = np.maximum(profile - noise_floor, 0)
     w_sum = weights.sum()
     
     mean_abs = float((weights * np.abs(v_axis)).sum() / w_sum) if w_sum > 0 else 0.0
-    peak_v = float(v_axis[int(np.argmax(profile))])
+    peak_v = float(_subbin_peak(profile, v_axis))
 
     # 2. Cadence (Steps-Per-Minute) Estimation
     spm = 0.0
     if len(t_axis) > 20:
         fps_est = len(t_axis) / float(t_axis[-1])
-        nv = spec.shape[1]
-        center_idx = nv // 2
-        
-        # We completely ignore the center stationary bins. We only want the kinetic 
-        # energy of the runner's limbs swinging forward and backward.
-        moving_bins = list(range(0, center_idx-2)) + list(range(center_idx+3, nv))
-        movement = np.sum(spec[:, moving_bins], axis=1)
-        
-        # Clean the 1D movement wave
-        movement = np.clip(movement, a_min=None, a_max=np.percentile(movement, 99.5))
-        movement = (movement - np.mean(movement)) / (np.std(movement) + 1e-6)
+        movement = _movement_signal(spec)
         
         try:
             # Human running/walking cadence usually falls strictly between 1.0Hz (60 SPM) and 4.0Hz (240 SPM).
@@ -179,4 +646,66 @@ def extract_gait_metrics(spec: np.ndarray, t_axis: np.ndarray, v_axis: np.ndarra
         except Exception as e:
             log.warning(f"Cadence processing error: {e}")
 
-    return peak_v, mean_abs, spm
\ No newline at end of file
+    return peak_v, mean_abs, spm
+
+def extract_gait_tracks(spec: np.ndarray, t_axis: np.ndarray, v_axis: np.ndarray,
+                        window_s: float = 10.0, hop_s: float = 1.0) -> dict:
+    """
+    Time-resolved version of extract_gait_metrics, so fatigue and pacing changes mid-run stay visible.
+    Every window_s window (advanced by hop_s) gets its cadence, dominant velocity and Doppler envelope.
+    All windows are evaluated in one batched pass: a strided view of the movement wave goes through
+    a single rFFT, and windowed velocity profiles come from a chunked running sum over time.
+    Expects the native-resolution spectrogram; velocities are interpolated between bins.
+    Returns a dict of equally long arrays keyed by 't', 'spm', 'peak_v', 'env_lo' and 'env_hi'.
+    """
+    empty = {k: np.empty(0, dtype=np.float32) for k in ("t", "spm", "peak_v", "env_lo", "env_hi")}
+    if len(t_axis) < 2 or float(t_axis[-1]) <= 0:
+        return empty
+
+    fps_est = len(t_axis) / float(t_axis[-1])
+    win = int(round(window_s * fps_est))
+    hop = max(1, int(round(hop_s * fps_est)))
+    if win < 20 or win > len(t_axis):
+        return empty
+
+    starts = np.arange(0, len(t_axis) - win + 1, hop)
+
+    # 1. Cadence: dominant step frequency of every window at once
+    segments = np.lib.stride_tricks.sliding_window_view(_movement_signal(spec), win)[starts]
+    segments = (segments - segments.mean(axis=1, keepdims=True)) * np.hanning(win)
+    
+    # Zero-pad to at least ~0.05 Hz bins so cadence isn't quantized to 6 SPM steps
+    nfft = 1 << int(np.ceil(np.log2(max(win, 20.0 * fps_est))))
+    power = np.abs(np.fft.rfft(segments, n=nfft, axis=1)) ** 2
+    freqs = np.fft.rfftfreq(nfft, d=1.0 / fps_est)
+
+    # Same human band (1.0 Hz = 60 SPM to 4.0 Hz = 240 SPM) as the offline bandpass filter
+    band = np.flatnonzero((freqs >= 1.0) & (freqs <= 4.0))
+    if band.size == 0:
+        return empty
+    k = band[np.argmax(power[:, band], axis=1)]
+
+    # Parabolic interpolation around the peak bin for sub-bin accuracy
+    k_in = np.clip(k, 1, len(freqs) - 2)
+    a, b, c = power[np.arange(len(k)), k_in - 1], power[np.arange(len(k)), k_in], power[np.arange(len(k)), k_in + 1]
+    denom = a - 2 * b + c
+    offset = np.where(np.abs(denom) > 1e-12, 0.5 * (a - c) / denom, 0.0)
+    spm = (freqs[k_in] + np.clip(offset, -0.5, 0.5) * (freqs[1] - freqs[0])) * 60.0
+
+    # 2. Velocity: mean profile of every window from a running sum over time
+    profiles = _window_means(spec, starts, win)
+    peak_v = _subbin_peak(profiles, v_axis)
+
+    # 3. Doppler envelope: outermost velocities still above half of the window's dynamic range
+    noise_floor = np.percentile(profiles, 20, axis=1, keepdims=True)
+    thresh = noise_floor + 0.5 * (profiles.max(axis=1, keepdims=True) - noise_floor)
+    env_lo = _crossing_velocity(profiles, thresh, v_axis, from_top=False)
+    env_hi = _crossing_velocity(profiles, thresh, v_axis, from_top=True)
+
+    return {
+        "t": t_axis[starts + win // 2].astype(np.float32),
+        "spm": spm.astype(np.float32),
+        "peak_v": peak_v.astype(np.float32),
+        "env_lo": env_lo.astype(np.float32),
+        "env_hi": env_hi.astype(np.float32),
+    }
@@ -0,0 +1,140 @@
+from collections import deque
+
+import numpy as np
+from scipy.signal import butter, sosfilt
+
+from core.radar.lut import db_table
+
+# ── 1. Waterfall Ring Buffer ─────────────────────────────────────────────────
+
+class WaterfallBuffer:
+    """
+    Fixed-size history of the last `depth` Doppler rows for a scrolling live spectrogram.
+    The buffer is stored (Velocity, 2 x depth), i.e. already in the row-major image layout
+    (rows = velocity, columns = time), and every row is written twice, at columns idx and
+    idx + depth. That way the newest `depth` rows are always the column slice [idx, idx + depth),
+    so appending costs O(Velocity) and reading is a view: nothing is ever rolled, transposed or copied.
+    """
+    def __init__(self, depth: int, num_bins: int, fill: float = 0.0, dtype=np.float32):
+        self.depth = max(1, int(depth))
+        self._buf = np.full((num_bins, 2 * self.depth), fill, dtype=dtype)
+        self._idx = 0
+        self.count = 0   # Rows pushed so far (saturates at depth)
+
+    def push(self, row: np.ndarray):
+        """Appends one (Velocity,) row, overwriting the oldest one."""
+        self._buf[:, self._idx] = row
+        self._buf[:, self._idx + self.depth] = row
+        self._idx = (self._idx + 1) % self.depth
+        self.count = min(self.count + 1, self.depth)
+
+    def view(self) -> np.ndarray:
+        """(Velocity, depth) view, oldest frame in the first column and newest in the last."""
+        return self._buf[:, self._idx:self._idx + self.depth]
+
+# ── 2. Online Cadence ────────────────────────────────────────────────────────
+
+class LiveCadence:
+    """
+    Streaming counterpart of extract_gait_metrics' cadence, fed one spectrogram row per frame.
+    The limb-motion sample is normalized with running (EMA) mean/variance, band-passed by a
+    Butterworth SOS filter whose state (zi) is carried from frame to frame, and a step is
+    counted when the filtered wave turns down after rising at least `prominence` above the
+    lowest point since the previous step. Every update is O(1) in the recording length.
+    Time is the frame count divided by fs, i.e. the radar's own clock, not network arrival.
+    """
+    def __init__(self, fs: float, band: tuple[float, float] = (1.0, 4.0), order: int = 4,
+                 window_s: float = 10.0, prominence: float = 0.4, norm_s: float = 10.0):
+        self.fs = fs
+        self.sos = butter(order, band, btype='band', fs=fs, output='sos')
+        self.zi = np.zeros((self.sos.shape[0], 2))
+        self.window_s = window_s
+        self.prominence = prominence
+        self.min_gap_s = 1.0 / band[1]   # Same 240 SPM ceiling as the offline peak distance
+        self._norm_alpha = 1.0 / max(1.0, norm_s * fs)
+
+        self.n = 0
+        self.spm = 0.0
+        self._mean, self._var = 0.0, 1.0
+        self._y1 = self._y2 = 0.0        # Last two filtered samples
+        self._trough = 0.0               # Lowest filtered value since the last step
+        self._last_step_t = -np.inf
+        self._steps = deque()
+
+    @staticmethod
+    def movement(row_db: np.ndarray) -> float:
+        """Limb-motion energy of one fftshifted Doppler row: every bin except the three around 0 m/s."""
+        c = row_db.shape[-1] // 2
+        return float(row_db.sum() - row_db[c - 1:c + 2].sum())
+
+    def update(self, sample: float) -> float:
+        """Consumes one movement sample and returns the rolling cadence in steps per minute."""
+        t = self.n / self.fs
+        self.n += 1
+
+        # Running z-score so the step threshold does not depend on the radar gain
+        if self.n == 1:
+            self._mean = sample
+        delta = sample - self._mean
+        self._mean += self._norm_alpha * delta
+        self._var = (1.0 - self._norm_alpha) * (self._var + self._norm_alpha * delta * delta)
+        z = delta / (np.sqrt(self._var) + 1e-6)
+
+        y, self.zi = sosfilt(self.sos, [z], zi=self.zi)
+        y = float(y[0])
+
+        # Local maximum one sample back: rising into y1, falling out of it
+        if self._y1 > self._y2 and self._y1 >= y:
+            t_peak = t - 1.0 / self.fs
+            if self._y1 - self._trough >= self.prominence and t_peak - self._last_step_t >= self.min_gap_s:
+                self._steps.append(t_peak)
+                self._last_step_t = t_peak
+                self._trough = self._y1
+        self._trough = min(self._trough, y)
+        self._y2, self._y1 = self._y1, y
+
+        # Rolling cadence from the steps inside the window
+        while self._steps and self._steps[0] < t - self.window_s:
+            self._steps.popleft()
+        if len(self._steps) >= 2:
+            self.spm = 60.0 * (len(self._steps) - 1) / max(self._steps[-1] - self._steps[0], 1e-6)
+        else:
+            self.spm = 0.0
+        return self.spm
+
+# ── 3. Display Contrast ──────────────────────────────────────────────────────
+
+class ContrastTracker:
+    """
+    Display levels (low/high percentile in dB) without sorting every frame.
+    Each uint16 cell is mapped to a fixed dB bin through a 65536-entry table, the frame's
+    bincount is blended into an exponentially weighted histogram, and both percentiles are
+    read off its cumulative sum. Cost per frame: one gather, one bincount and a few hundred
+    bins, and the levels glide instead of flickering when a single frame is unusually bright.
+    """
+    def __init__(self, low_pct: float, high_pct: float, alpha: float = 0.1, bin_db: float = 0.5, eps: float = 1e-6):
+        self.low_pct, self.high_pct = low_pct, high_pct
+        self.alpha = alpha
+
+        table = db_table(eps)
+        self.db_min = float(np.floor(table[0]))
+        self.bin_db = bin_db
+        self.bin_of = ((table - self.db_min) / bin_db).astype(np.intp)   # uint16 value -> histogram bin
+        self.hist = np.zeros(int(self.bin_of[-1]) + 1, dtype=np.float64)
+        self._primed = False
+
+    def update(self, raw: np.ndarray) -> tuple[float, float]:
+        """Adds one uint16 frame and returns the current (lo, hi) levels in dB."""
+        counts = np.bincount(self.bin_of[raw].ravel(), minlength=self.hist.size) / raw.size
+        if self._primed:
+            self.hist *= 1.0 - self.alpha
+            self.hist += self.alpha * counts
+        else:
+            self.hist[:] = counts
+            self._primed = True
+
+        cdf = np.cumsum(self.hist)
+        lo_bin, hi_bin = np.searchsorted(cdf, [self.low_pct / 100.0 * cdf[-1], self.high_pct / 100.0 * cdf[-1]])
+        lo = self.db_min + float(lo_bin) * self.bin_db
+        hi = self.db_min + float(hi_bin + 1) * self.bin_db
+        return lo, max(hi, lo + 0.1)
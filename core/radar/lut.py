@@ -0,0 +1,53 @@
+from functools import lru_cache
+
+import numpy as np
+
+# ── 1. Lookup Tables ─────────────────────────────────────────────────────────
+# RDHM cells are uint16, so 20*log10(x + eps) only ever sees 65536 distinct inputs.
+# Computing them once turns every per-frame or per-cube dB conversion into a gather.
+
+@lru_cache(maxsize=4)
+def db_table(eps: float = 1e-9) -> np.ndarray:
+    """Read-only float32 table with table[x] == 20*log10(float32(x) + eps) for every uint16 x."""
+    table = 20.0 * np.log10(np.arange(65536, dtype=np.float32) + np.float32(eps))
+    table.flags.writeable = False
+    return table
+
+@lru_cache(maxsize=8)
+def fftshift_permutation(num_loops: int) -> np.ndarray:
+    """Column order that fftshifts the Doppler axis: shifted[..., j] == raw[..., perm[j]]."""
+    perm = np.fft.fftshift(np.arange(num_loops))
+    perm.flags.writeable = False
+    return perm
+
+# ── 2. The Conversion Kernel ─────────────────────────────────────────────────
+
+class DecibelLUT:
+    """
+    uint16 RDHM -> dB kernel shared by the live viewers and the offline DSP.
+    convert() gathers the raw cells in fftshifted column order and maps them through
+    the dB table; quantize() windows that result into uint8 display levels, so an
+    ImageItem can show it with fixed (0, 255) levels and skip its own float rescale.
+    """
+    def __init__(self, num_loops: int, eps: float = 1e-9, shift: bool = True):
+        self.table = db_table(eps)
+        self.perm = fftshift_permutation(num_loops) if shift else None
+
+    def _shifted(self, raw: np.ndarray) -> np.ndarray:
+        return raw if self.perm is None else np.take(raw, self.perm, axis=-1)
+
+    def convert(self, raw: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """(..., Velocity) uint16 -> float32 dB with 0 m/s in the centre column."""
+        return np.take(self.table, self._shifted(raw), out=out)
+
+    def quantize(self, raw: np.ndarray, lo_db: float, hi_db: float) -> np.ndarray:
+        """
+        (..., Velocity) uint16 -> uint8 display levels, lo_db -> 0 and hi_db -> 255.
+        The window is applied per cell rather than through a 65536-entry level table:
+        the live contrast window moves almost every frame, and a frame has far fewer cells.
+        """
+        level = self.convert(raw)
+        level -= lo_db
+        level *= 255.0 / max(hi_db - lo_db, 1e-6)
+        np.clip(level, 0, 255, out=level)
+        return level.astype(np.uint8)
@@ -102,6 +102,19 @@ class RadarConfig:
         self.T         = frame["periodicity"]   # Frame period in milliseconds
         self.frameRate = 1e3 / self.T           # Frames per second (FPS)
 
+    def range_axis(self) -> np.ndarray:
+        """Range (m) at the centre of each range bin, as the heatmap draws them from 0 m."""
+        return ((np.arange(self.numRangeBins) + 0.5) * self.rangeRes).astype(np.float32)
+
+    def velocity_axis(self) -> np.ndarray:
+        """
+        Velocity (m/s) of each Doppler bin in fftshifted order. The DC bin (numLoops // 2)
+        is exactly 0 m/s, so the axis runs from -dopMax to dopMax - one cell. Heatmaps that
+        draw these bins as cells are shifted down by half a cell to stay centred on them.
+        """
+        cell = 2.0 * self.dopMax / self.numLoops
+        return ((np.arange(self.numLoops) - self.numLoops // 2) * cell).astype(np.float32)
+
     def summary(self) -> dict:
         """Returns a clean summary dictionary for the UI console."""
         return {
@@ -1,6 +1,5 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import plotly.graph_objects as go
 
 from core.io import structs
@@ -12,30 +11,7 @@ def process_analysis_data(df_raw):
     """Replicates the heavy math pipeline."""
     session = structs.df_to_session(df_raw)
     ts_df, _ = kinematics.generate_analysis_report(session)
-    
-    ts_df['time_sec'] = np.floor(ts_df['timestamp']).astype(int)
-    numeric_cols = [c for c in ts_df.columns if c not in ['frame', 'time_sec', 'timestamp']]
-    
-    df_per_sec = ts_df.groupby('time_sec')[numeric_cols].mean().reset_index()
-    df_per_sec['timestamp'] = df_per_sec['time_sec']
-    
-    ts_df['time_min'] = np.floor(ts_df['timestamp'] / 60.0).astype(int)
-    df_per_min = ts_df.groupby('time_min')[numeric_cols].mean().reset_index()
-    df_per_min['timestamp'] = df_per_min['time_min']
-    
-    trend_metrics = {}
-    if len(df_per_sec) > 1:
-        x_mins = df_per_sec['time_sec'] / 60.0
-        for col in numeric_cols:
-            mask = ~np.isnan(df_per_sec[col])
-            if mask.sum() > 1:
-                slope, _ = np.polyfit(x_mins[mask], df_per_sec[col][mask], 1)
-                trend_metrics[f"slope_{col}"] = slope
-
-    stats_df = df_per_sec.drop(columns=['time_sec', 'timestamp', 'time_min'], errors='ignore').describe().T
-    stats_df['trend/min'] = stats_df.index.map(lambda x: trend_metrics.get(f"slope_{x}", 0.0))
-
-    return ts_df, df_per_sec, df_per_min, stats_df
+    return kinematics.summarize_timeseries(ts_df)
 
 def create_kinematic_plot(df, x_col, y_cols, names, colors, title, show_env=False):
     """Generates a Plotly chart with optional SD Variance Envelopes."""
@@ -1,47 +1,180 @@
 import streamlit as st
 import numpy as np
 import plotly.graph_objects as go
+from plotly.colors import get_colorscale, sample_colorscale, unlabel_rgb
+from PIL import Image
 import tempfile
+import base64
+import io
 import os
 import configparser
 
 from core.radar.parser import RadarConfig
-from core.radar.dsp import RecordingSession, extract_gait_metrics
-from core.ui.theme import COLOR_RADAR_BG, COLOR_CENTROID_MAIN, COLOR_CENTROID_SHADOW, COLOR_ZERO_LINE, SETTINGS_PATH
+from core.radar.cache import CubeCache, bytes_digest
+from core.radar.dsp import RecordingSession, extract_gait_metrics, extract_gait_tracks, upsample_velocity, range_blocks
+from core.ui.theme import COLOR_RADAR_BG, COLOR_CENTROID_MAIN, COLOR_CENTROID_SHADOW, COLOR_ZERO_LINE, COLOR_LEFT, COLOR_RIGHT, SETTINGS_PATH
 
-# ─── CACHED FFT DSP ENGINE ───────────────────────────────────────────────────
-@st.cache_data(show_spinner=False)
-def process_radar_data(file_bytes, range_lo, range_hi, smooth_window):
+# ─── DECODED CUBE CACHE ──────────────────────────────────────────────────────
+@st.cache_resource(show_spinner=False)
+def get_cube_cache():
+    """
+    One shared on-disk cache of decoded radar cubes for the whole Studio server.
+    A relative radar_cache_dir is taken relative to settings.ini, not to wherever
+    streamlit happened to be launched from.
+    """
+    config = configparser.ConfigParser(interpolation=None)
+    config.read(SETTINGS_PATH)
+    cache_dir = config.get('Cache', 'radar_cache_dir', fallback='cache/radar')
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(SETTINGS_PATH)), os.path.expanduser(cache_dir))
+    cache_mb = config.getint('Cache', 'radar_cache_mb', fallback=2048)
+    return CubeCache(cache_dir, max_bytes=cache_mb * 1024 * 1024)
+
+def load_radar_config():
+    """The hardware .cfg named in settings.ini, or None if it is missing or unreadable."""
+    config = configparser.ConfigParser(interpolation=None)
+    config.read(SETTINGS_PATH)
+    hw_cfg_file = config.get('Hardware', 'radar_cfg_file', fallback=None)
+    
+    try:
+        return RadarConfig(hw_cfg_file)
+    except:
+        return None
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def load_radar_session(digest, _file_bytes):
     """
-    Saves the uploaded RAM buffer to a temp file, runs the heavy Texas Instruments 
-    parser and FFT math, and returns the raw arrays.
+    Returns a RecordingSession for the upload. A cache hit starts straight from the
+    memory-mapped cube; only a miss writes the upload to a temp file and decodes the Parquet.
+    render() refuses to get here without a radar config; the cache key is derived from it.
     """
+    radar_cfg = load_radar_config()
+    if radar_cfg is None:
+        raise ValueError("No readable radar config (Hardware / radar_cfg_file in settings.ini).")
+
+    cube_cache = get_cube_cache()
+    hit = cube_cache.get(digest, radar_cfg)
+    if hit is not None:
+        return RecordingSession.from_cube(*hit, cfg=radar_cfg)
+
     with tempfile.NamedTemporaryFile(delete=False, suffix='.parquet') as tmp:
-        tmp.write(file_bytes)
+        tmp.write(_file_bytes)
         tmp_path = tmp.name
 
     try:
-        config = configparser.ConfigParser(interpolation=None)
-        config.read(SETTINGS_PATH)
-        hw_cfg_file = config.get('Hardware', 'radar_cfg_file')
-        
-        try:
-            radar_cfg = RadarConfig(hw_cfg_file)
-        except:
-            radar_cfg = None
-
-        session = RecordingSession(tmp_path, radar_cfg)
-        spec, t_axis, v_axis, centroid = session.build_spectrogram(range_lo, range_hi, smooth_window)
-        peak_v, mean_abs, spm = extract_gait_metrics(spec, t_axis, v_axis)
-        
-        fps = session.num_frames / session.duration_s if session.duration_s > 0 else 0
-        res = radar_cfg.dopRes if radar_cfg else 0.0
-
-        return spec, t_axis, v_axis, centroid, peak_v, mean_abs, spm, session.duration_s, session.num_frames, fps, res
-        
+        return RecordingSession(tmp_path, radar_cfg, cache=cube_cache)
     finally:
         os.remove(tmp_path)
 
+# ─── LEVEL-OF-DETAIL SPECTROGRAM ─────────────────────────────────────────────
+TILE_COLS = 1600   # Roughly the widest the chart gets on screen; no point sending more time columns
+
+class SpectrogramPyramid:
+    """
+    Level-of-detail pyramid of a native-resolution (Time, Velocity) spectrogram.
+    Level k max-pools 2^k frames along time (max keeps short footstrike flashes visible).
+    The renderer picks the coarsest level that still has about TILE_COLS frames in view.
+    """
+    def __init__(self, spec_db: np.ndarray, t_axis: np.ndarray, dop_max: float):
+        self.dop_max = dop_max
+        self.levels = [spec_db]
+        self.t_levels = [t_axis]
+        
+        while self.levels[-1].shape[0] > TILE_COLS:
+            prev, t_prev = self.levels[-1], self.t_levels[-1]
+            n = prev.shape[0] // 2 * 2
+            pooled = np.maximum(prev[0:n:2], prev[1:n:2])
+            if prev.shape[0] > n:
+                pooled = np.vstack([pooled, prev[n:]])   # Odd row count: carry the last frame up
+            self.levels.append(pooled)
+            self.t_levels.append(t_prev[::2])
+
+    def window(self, t_start: float, t_end: float) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the (tile, tile_times) covering [t_start, t_end] at the resolution the view needs."""
+        for spec, t in zip(self.levels, self.t_levels):
+            lo, hi = np.searchsorted(t, [t_start, t_end], side='left')
+            hi = max(hi, lo + 1)
+            if hi - lo <= TILE_COLS or spec is self.levels[-1]:
+                return spec[lo:hi], t[lo:hi]
+
+@st.cache_data(show_spinner=False)
+def colormap_lut(name: str) -> np.ndarray:
+    """256-entry RGB lookup table sampled from the same Plotly colorscale the Heatmap used."""
+    colors = sample_colorscale(get_colorscale(name), np.linspace(0.0, 1.0, 256))
+    return np.array([unlabel_rgb(c) for c in colors], dtype=np.float32).round().astype(np.uint8)
+
+def render_tile(pyramid: SpectrogramPyramid, t_start: float, t_end: float, z_min: float, z_max: float, lut: np.ndarray) -> dict:
+    """
+    Server-side rendering of the visible tile: upsample along velocity, map through the
+    colormap LUT and encode as a PNG that Plotly stretches over the axes as a layout image.
+    """
+    tile, t_tile = pyramid.window(t_start, t_end)
+    half_cell = pyramid.dop_max / tile.shape[1]   # Native cells are centred on their velocity
+    tile, _ = upsample_velocity(tile, pyramid.dop_max)
+
+    # One vectorized gather through the LUT instead of shipping raw z-values to the browser
+    levels = np.clip((tile - z_min) * (255.0 / (z_max - z_min)), 0, 255).astype(np.uint8)
+    rgb = lut[levels.T[::-1]]   # Rows = velocity (highest at the top), columns = time
+
+    buffer = io.BytesIO()
+    Image.fromarray(np.ascontiguousarray(rgb)).save(buffer, format="PNG")
+    source = "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+    # Stretch the last column to the end of the window so the tile meets the axis edge
+    x1 = max(float(t_end), float(t_tile[-1]))
+    return dict(source=source, xref="x", yref="y", x=float(t_tile[0]), y=pyramid.dop_max - half_cell,
+                sizex=x1 - float(t_tile[0]), sizey=2 * pyramid.dop_max,
+                sizing="stretch", layer="below")
+
+# ─── CACHED FFT DSP ENGINE ───────────────────────────────────────────────────
+CLUTTER_ALPHA = 0.02   # Per-frame clutter map weight (~3 s memory at 15 FPS)
+
+@st.cache_data(show_spinner=False)
+def process_radar_data(digest, _file_bytes, range_lo, range_hi, smooth_window, clutter_alpha=0.0, follow_width=0.0):
+    """
+    Runs the FFT math on the (cached) decoded session and returns the raw arrays.
+    Keyed on the upload's content hash, so changing the gate never re-decodes the Parquet.
+    follow_width > 0 turns the range inputs into a search region and gates a window of that
+    width around the tracked subject instead.
+    The spectrogram and the gait metrics stay at native velocity resolution; only the
+    visible display tile is upsampled.
+    """
+    session = load_radar_session(digest, _file_bytes)
+    radar_cfg = session.cfg
+
+    gate_track = None
+    gate_lo, gate_hi = range_lo, range_hi
+    if follow_width > 0:
+        gate_track = session.track_subject(range_lo, range_hi)
+        gate_lo, gate_hi = gate_track - follow_width / 2.0, gate_track + follow_width / 2.0
+
+    spec, t_axis, v_axis, centroid = session.build_spectrogram(gate_lo, gate_hi, smooth_window, upsample=1, clutter_alpha=clutter_alpha)
+
+    # Peak velocities are interpolated between native bins, no upsampled copy needed
+    peak_v, mean_abs, spm = extract_gait_metrics(spec, t_axis, v_axis)
+    tracks = extract_gait_tracks(spec, t_axis, v_axis)
+    
+    fps = session.num_frames / session.duration_s if session.duration_s > 0 else 0
+    res = radar_cfg.dopRes
+
+    pyramid = SpectrogramPyramid(spec, t_axis, radar_cfg.dopMax)
+    return pyramid, t_axis, centroid, gate_track, peak_v, mean_abs, spm, tracks, session.duration_s, session.num_frames, fps, res
+
+@st.cache_data(show_spinner=False)
+def process_radar_stack(digest, _file_bytes, range_lo, range_hi, block_m, smooth_window, clutter_alpha=0.0):
+    """
+    Splits the range gate into back-to-back blocks and builds all their spectrograms in one pass,
+    so two subjects (or a subject and a moving object) can be told apart.
+    Returns a list of (label, pyramid, centroid) per block.
+    """
+    session = load_radar_session(digest, _file_bytes)
+    gates = range_blocks(range_lo, range_hi, block_m, session.cfg)
+    stack, t_axis, _, centroids = session.build_spectrogram_stack(gates, smooth_window, upsample=1, clutter_alpha=clutter_alpha)
+
+    # Labels use the bin edges the gates actually snapped to
+    res = session.cfg.rangeRes
+    return [(f"{lo - res / 2:.1f} - {hi - res / 2:.1f} m", SpectrogramPyramid(spec, t_axis, session.cfg.dopMax), c)
+            for (lo, hi), spec, c in zip(gates, stack, centroids)]
+
 
 def render():
     
@@ -56,6 +189,11 @@ def render():
         col_lo, col_hi = st.columns(2)
         range_lo = col_lo.number_input("Min Range", min_value=0.0, max_value=49.0, value=0.0, step=0.1)
         range_hi = col_hi.number_input("Max Range", min_value=0.1, max_value=50.0, value=5.0, step=0.1)
+        follow_subject = st.checkbox("Follow Subject", value=False, help="Search the range above and gate a window around the runner.")
+        follow_width = st.number_input("Gate Width (m)", min_value=0.2, max_value=5.0, value=1.0, step=0.1, disabled=not follow_subject)
+        suppress_clutter = st.checkbox("Suppress Static Clutter", value=False)
+        split_range = st.checkbox("Split Into Range Blocks", value=False, help="One spectrogram per block of the range gate.")
+        block_m = st.number_input("Block Size (m)", min_value=0.2, max_value=5.0, value=1.0, step=0.1, disabled=not split_range)
         
         st.subheader("Visuals")
         
@@ -73,11 +211,17 @@ def render():
             st.session_state.current_page = "hub"
             st.rerun()
 
+    if uploaded_file is not None and load_radar_config() is None:
+        st.error("Radar config could not be loaded. Check Hardware / radar_cfg_file in settings.ini.")
+        return
+
     if uploaded_file is not None:
         with st.spinner("Crunching Micro-Doppler FFTs..."):
             
-            spec, t_axis, v_axis, centroid, peak_v, mean_abs, spm, dur, frames, fps, res = process_radar_data(
-                uploaded_file.getvalue(), range_lo, range_hi, int(smooth_win)
+            file_bytes = uploaded_file.getvalue()
+            pyramid, t_axis, centroid, gate_track, peak_v, mean_abs, spm, tracks, dur, frames, fps, res = process_radar_data(
+                bytes_digest(file_bytes), file_bytes, range_lo, range_hi, int(smooth_win),
+                CLUTTER_ALPHA if suppress_clutter else 0.0, float(follow_width) if follow_subject else 0.0
             )
 
         # ─── 1. METRICS SECTION (MOVED TO TOP) ───
@@ -115,30 +259,31 @@ def render():
         st.caption("Time-velocity distribution of the target.")
         
         with st.container(border=True):
-            sub_spec = spec[::4, ::4]
-            z_min = float(np.percentile(sub_spec, cont_lo))
-            z_max = float(np.percentile(sub_spec, cont_hi))
+            t_full = max(float(t_axis[-1]), 0.1) if len(t_axis) > 1 else 0.1
+            t_start, t_end = st.slider("Time Window (s):", min_value=0.0, max_value=t_full, value=(0.0, t_full), step=0.1)
+            if t_end <= t_start: t_end = t_start + 0.1
+
+            # Contrast comes from a decimated full-session view so it stays stable while zooming
+            overview = pyramid.levels[0][::max(1, len(t_axis) // (4 * TILE_COLS))]
+            z_min = float(np.percentile(overview, cont_lo))
+            z_max = float(np.percentile(overview, cont_hi))
             if z_min >= z_max: z_max = z_min + 0.1
             
             fig = go.Figure()
-            
-            fig.add_trace(go.Heatmap(
-                z=spec.T, x=t_axis, y=v_axis,
-                colorscale=plotly_cmap,
-                zmin=z_min, zmax=z_max,
-                hoverinfo='skip', 
-                showscale=False   
-            ))
+            fig.add_layout_image(render_tile(pyramid, t_start, t_end, z_min, z_max, colormap_lut(plotly_cmap)))
 
             if show_centroid and centroid is not None:
-                fig.add_trace(go.Scatter(x=t_axis, y=centroid, mode='lines', line=dict(color=COLOR_CENTROID_SHADOW, width=4), hoverinfo='skip', showlegend=False))
-                fig.add_trace(go.Scatter(x=t_axis, y=centroid, mode='lines', name='Mass Centroid', line=dict(color=COLOR_CENTROID_MAIN, width=1.5),  showlegend=False))
+                lo, hi = np.searchsorted(t_axis, [t_start, t_end])
+                step = max(1, (hi - lo) // TILE_COLS)
+                t_line, c_line = t_axis[lo:hi:step], centroid[lo:hi:step]
+                fig.add_trace(go.Scatter(x=t_line, y=c_line, mode='lines', line=dict(color=COLOR_CENTROID_SHADOW, width=4), hoverinfo='skip', showlegend=False))
+                fig.add_trace(go.Scatter(x=t_line, y=c_line, mode='lines', name='Mass Centroid', line=dict(color=COLOR_CENTROID_MAIN, width=1.5),  showlegend=False))
 
             fig.add_hline(y=0, line_dash="dash", line_color=COLOR_ZERO_LINE, line_width=1)
 
             fig.update_layout(
-                xaxis_title="Time (Seconds)",
-                yaxis_title="Doppler Velocity (m/s)",
+                xaxis=dict(title="Time (Seconds)", range=[t_start, t_end], showgrid=False),
+                yaxis=dict(title="Doppler Velocity (m/s)", range=[-pyramid.dop_max, pyramid.dop_max], showgrid=False),
                 height=600,
                 margin=dict(l=0, r=0, t=10, b=0),
                 plot_bgcolor=COLOR_RADAR_BG,
@@ -146,6 +291,86 @@ def render():
             )
 
             st.plotly_chart(fig, width="stretch")
+
+            if gate_track is not None:
+                step = max(1, len(t_axis) // TILE_COLS)
+                t_g, g = t_axis[::step], gate_track[::step]
+                half = float(follow_width) / 2.0
+
+                fig_gate = go.Figure()
+                fig_gate.add_trace(go.Scatter(x=t_g, y=g + half, mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'))
+                fig_gate.add_trace(go.Scatter(x=t_g, y=g - half, mode='lines', name='Gate', line=dict(width=0), fill='tonexty', fillcolor="rgba(0,95,184,0.2)"))
+                fig_gate.add_trace(go.Scatter(x=t_g, y=g, mode='lines', name='Subject Range', line=dict(color=COLOR_LEFT, width=2)))
+                fig_gate.update_layout(
+                    xaxis=dict(title="Time (Seconds)", range=[t_start, t_end]), yaxis_title="Range (m)",
+                    height=220, hovermode="x unified", margin=dict(l=0, r=0, t=10, b=0),
+                    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+                )
+                st.plotly_chart(fig_gate, width="stretch")
+
+        st.write("") # Quick spacer
+
+        # ─── 3. RANGE STACK SECTION ───
+        if split_range:
+            st.subheader("Range Blocks")
+            st.caption("Separate micro-Doppler signatures per distance, on a shared contrast scale.")
+
+            with st.spinner("Splitting range gate..."):
+                blocks = process_radar_stack(bytes_digest(file_bytes), file_bytes, range_lo, range_hi, float(block_m),
+                                             int(smooth_win), CLUTTER_ALPHA if suppress_clutter else 0.0)
+
+            overview = np.concatenate([p.levels[-1].ravel() for _, p, _ in blocks])
+            zb_min = float(np.percentile(overview, cont_lo))
+            zb_max = float(np.percentile(overview, cont_hi))
+            if zb_min >= zb_max: zb_max = zb_min + 0.1
+
+            lo, hi = np.searchsorted(t_axis, [t_start, t_end])
+            step = max(1, (hi - lo) // TILE_COLS)
+            cols = st.columns(2)
+            for i, (label, block_pyramid, block_centroid) in enumerate(blocks):
+                with cols[i % 2]:
+                    with st.container(border=True):
+                        fig_b = go.Figure()
+                        fig_b.add_layout_image(render_tile(block_pyramid, t_start, t_end, zb_min, zb_max, colormap_lut(plotly_cmap)))
+                        if show_centroid:
+                            fig_b.add_trace(go.Scatter(x=t_axis[lo:hi:step], y=block_centroid[lo:hi:step], mode='lines', line=dict(color=COLOR_CENTROID_MAIN, width=1.5), showlegend=False))
+                        fig_b.update_layout(
+                            title=label,
+                            xaxis=dict(title="Time (Seconds)", range=[t_start, t_end], showgrid=False),
+                            yaxis=dict(title="Velocity (m/s)", range=[-block_pyramid.dop_max, block_pyramid.dop_max], showgrid=False),
+                            height=280, margin=dict(l=0, r=0, t=40, b=0),
+                            plot_bgcolor=COLOR_RADAR_BG, paper_bgcolor='rgba(0,0,0,0)'
+                        )
+                        st.plotly_chart(fig_b, width="stretch")
+
+            st.write("") # Quick spacer
+
+        # ─── 4. GAIT TRACKS SECTION ───
+        st.subheader("Gait Tracks")
+        st.caption("Cadence and velocity over sliding 10 s windows.")
+
+        if len(tracks["t"]) == 0:
+            st.info("Recording is too short for windowed gait tracks.")
+        else:
+            track_layout = dict(xaxis_title="Time (Seconds)", hovermode="x unified", height=350,
+                                margin=dict(l=0, r=0, t=40, b=0),
+                                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1))
+            col_cad, col_vel = st.columns(2)
+
+            with col_cad:
+                with st.container(border=True):
+                    fig_cad = go.Figure(go.Scatter(x=tracks["t"], y=tracks["spm"], mode='lines', name='Cadence', line=dict(color=COLOR_RIGHT, width=2.5)))
+                    fig_cad.update_layout(title="Cadence", yaxis_title="Steps / Minute", **track_layout)
+                    st.plotly_chart(fig_cad, width="stretch")
+
+            with col_vel:
+                with st.container(border=True):
+                    fig_vel = go.Figure()
+                    fig_vel.add_trace(go.Scatter(x=tracks["t"], y=tracks["env_hi"], mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'))
+                    fig_vel.add_trace(go.Scatter(x=tracks["t"], y=tracks["env_lo"], mode='lines', name='Doppler Envelope', line=dict(width=0), fill='tonexty', fillcolor="rgba(0,95,184,0.2)"))
+                    fig_vel.add_trace(go.Scatter(x=tracks["t"], y=tracks["peak_v"], mode='lines', name='Dominant Velocity', line=dict(color=COLOR_LEFT, width=2.5)))
+                    fig_vel.update_layout(title="Velocity", yaxis_title="Velocity (m/s)", **track_layout)
+                    st.plotly_chart(fig_vel, width="stretch")
             
     else:
         st.info("Upload a dataset to generate spectrogram.")
\ No newline at end of file
@@ -8,13 +8,15 @@ import scipy.ndimage as ndimage
 import pyqtgraph as pg
 import configparser
 import cv2  # Added for OpenCV rendering
+from functools import lru_cache
 from PIL import Image, ImageDraw, ImageFont
 
-from PyQt6.QtCore import QThread, pyqtSignal, Qt
+from PyQt6.QtCore import QThread, QEvent, pyqtSignal, Qt
 from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QHBoxLayout, QLabel
 from PyQt6.QtGui import QPixmap, QIcon, QImage # Added QImage
 
 from core.radar.parser import RadarConfig
+from core.radar.lut import DecibelLUT
 from core.ui.theme import COLOR_MAIN_BG, COLOR_TEXT, APP_VERSION, ICON_PATH, SETTINGS_PATH
 
 # Setup terminal logging
@@ -61,6 +63,9 @@ class ZmqRadarWorker(QThread):
         self.max_bin = min(int(MAX_RANGE / cfg.rangeRes), cfg.numRangeBins)
         self._expected_size = self.num_range_bins * self.num_vel_bins
 
+        # uint16 -> dB (with fftshift) through a precomputed table, one gather per frame
+        self.to_db = DecibelLUT(self.num_vel_bins, eps=1e-6)
+
         # Configure secure SUB socket
         self.context = zmq.Context()
         self.socket = self.context.socket(zmq.SUB)
@@ -83,9 +88,8 @@ class ZmqRadarWorker(QThread):
                 if raw.size != self._expected_size: continue
 
                 # Calculate radar heatmap (dB) and upsample for rendering
-                rd = raw.astype(np.float32).reshape(self.num_range_bins, self.num_vel_bins)
-                rd = rd[:self.max_bin, :]
-                display = 20.0 * np.log10(np.abs(np.fft.fftshift(rd, axes=1)) + 1e-6)
+                rd = raw.reshape(self.num_range_bins, self.num_vel_bins)[:self.max_bin, :]
+                display = self.to_db.convert(rd)
                 smooth = ndimage.zoom(display, (self.zoom_y, self.zoom_x), order=1)
                 
                 # Dynamic contrast scaling
@@ -104,14 +108,156 @@ class ZmqRadarWorker(QThread):
         self.socket.close()
         self.context.term()
 
+# ── Showcase Overlay ──────────────────────────────────────────────────────────
+
+SKELETON_CONNS = [
+    (0,1), (1,2), (2,3), (3,7), (0,4), (4,5), (5,6), (6,8), (9,10), # Face
+    (11,12), (11,13), (13,15), (15,17), (15,19), (15,21), (17,19),  # Left Arm/Hand
+    (12,14), (14,16), (16,18), (16,20), (16,22), (18,20),           # Right Arm/Hand
+    (11,23), (12,24), (23,24),                                      # Torso
+    (23,25), (25,27), (27,29), (29,31), (31,27),                    # Left Leg/Foot
+    (24,26), (26,28), (28,30), (30,32), (32,28)                     # Right Leg/Foot
+]
+
+ANGLES_TO_TRACK = {
+    'L_Knee': (23, 25, 27), 'R_Knee': (24, 26, 28),
+    'L_Elbow': (11, 13, 15), 'R_Elbow': (12, 14, 16)
+}
+
+# OpenCV BGR Colors for shapes
+CV_LEFT   = (0, 165, 255)
+CV_RIGHT  = (255, 130, 0)
+CV_CENTER = (255, 255, 255)
+
+# Brightened text colors for contrast against the black box (BGR, the frame stays BGR)
+TXT_LEFT  = (50, 180, 255)     # Bright Orange
+TXT_RIGHT = (255, 200, 100)    # Light Sky Blue
+TXT_WHITE = (255, 255, 255)
+
+HUD_RECT  = (10, 10, 130, 200) # x0, y0, x1, y1 (inclusive, like cv2.rectangle)
+HUD_SHADE = 0.2                # What is left of the video underneath the HUD panel
+
+@lru_cache(maxsize=4)
+def _load_font(size: int):
+    """Loads the HUD font once per size instead of from disk on every frame."""
+    try:
+        return ImageFont.truetype("roboto.ttf", size)
+    except IOError:
+        return ImageFont.load_default()
+
+class ShowcaseOverlay:
+    """
+    Skeleton + telemetry HUD drawn straight onto a BGR frame.
+    Text is rasterized by Pillow once per distinct string into an alpha mask and then
+    alpha-blended into its small ROI, so a frame never round-trips through PIL or RGB,
+    and the HUD panel is shaded in place instead of blending a full-frame copy.
+    """
+    MAX_SPRITES = 1024
+
+    def __init__(self):
+        self.font_title = _load_font(12)
+        self.font_body = _load_font(10)
+        self._sprites = {}
+
+    def _sprite(self, text: str, font) -> np.ndarray:
+        """Cached (H, W) float32 coverage mask for `text`, positioned like draw.text((0, 0))."""
+        key = (text, id(font))
+        mask = self._sprites.get(key)
+        if mask is None:
+            if len(self._sprites) >= self.MAX_SPRITES:
+                self._sprites.clear()
+            _, _, right, bottom = font.getbbox(text)
+            canvas = Image.new("L", (max(1, int(right)), max(1, int(bottom))), 0)
+            ImageDraw.Draw(canvas).text((0, 0), text, font=font, fill=255)
+            mask = np.asarray(canvas, dtype=np.float32)[..., None] / 255.0
+            self._sprites[key] = mask
+        return mask
+
+    def _put_text(self, frame: np.ndarray, xy: tuple[int, int], text: str, font, color: tuple):
+        """Alpha-blends a cached text sprite into the frame (clipped to its borders)."""
+        mask = self._sprite(text, font)
+        x, y = xy
+        h = min(mask.shape[0], frame.shape[0] - y)
+        w = min(mask.shape[1], frame.shape[1] - x)
+        if h <= 0 or w <= 0:
+            return
+        alpha = mask[:h, :w]
+        roi = frame[y:y + h, x:x + w]
+        blended = roi + alpha * (np.asarray(color, dtype=np.float32) - roi)
+        np.rint(blended, out=blended)
+        roi[:] = blended
+
+    @staticmethod
+    def _joint_angle(meta: dict, i1: int, i2: int, i3: int) -> int | None:
+        """Angle at joint i2 in whole degrees, or None for a degenerate limb."""
+        v1 = np.array([meta[f"j{i1}_x"], meta[f"j{i1}_y"], meta[f"j{i1}_z"]])
+        v2 = np.array([meta[f"j{i2}_x"], meta[f"j{i2}_y"], meta[f"j{i2}_z"]])
+        v3 = np.array([meta[f"j{i3}_x"], meta[f"j{i3}_y"], meta[f"j{i3}_z"]])
+
+        ba, bc = v1 - v2, v3 - v2
+        n_ba, n_bc = np.linalg.norm(ba), np.linalg.norm(bc)
+        if n_ba == 0 or n_bc == 0:
+            return None
+
+        cosine = np.dot(ba, bc) / (n_ba * n_bc)
+        return int(np.degrees(np.arccos(np.clip(cosine, -1.0, 1.0))))
+
+    def draw(self, frame: np.ndarray, meta: dict) -> np.ndarray:
+        """Draws the full MediaPipe skeleton and a compact HD Telemetry Sidebar, in place."""
+        # 1. Draw Skeleton Lines (Underneath)
+        for p1, p2 in SKELETON_CONNS:
+            if f"j{p1}_px" in meta and f"j{p2}_px" in meta:
+                pt1 = (int(meta[f"j{p1}_px"]), int(meta[f"j{p1}_py"]))
+                pt2 = (int(meta[f"j{p2}_px"]), int(meta[f"j{p2}_py"]))
+                cv2.line(frame, pt1, pt2, (220, 220, 220), 2, cv2.LINE_AA)
+
+        # 2. Draw Side-Coded Joints (On Top)
+        for i in range(33):
+            if f"j{i}_px" in meta and f"j{i}_py" in meta:
+                cx, cy = int(meta[f"j{i}_px"]), int(meta[f"j{i}_py"])
+
+                if i == 0: dot_color = CV_CENTER
+                elif i % 2 != 0: dot_color = CV_LEFT
+                else: dot_color = CV_RIGHT
+
+                cv2.circle(frame, (cx, cy), 5, (255, 255, 255), 2, cv2.LINE_AA)
+                cv2.circle(frame, (cx, cy), 4, dot_color, -1, cv2.LINE_AA)
+
+        # 3. Compact HUD Sidebar: darken only the panel region
+        x0, y0, x1, y1 = HUD_RECT
+        hud = frame[y0:y1 + 1, x0:x1 + 1]
+        np.multiply(hud, HUD_SHADE, out=hud, casting="unsafe")
+
+        # 4. HD Text (cached sprites)
+        self._put_text(frame, (15, 15), "Metrics", self.font_title, TXT_WHITE)
+
+        y_offset = 30
+        for name, (i1, i2, i3) in ANGLES_TO_TRACK.items():
+            if all(f"j{i}_x" in meta for i in [i1, i2, i3]):
+                deg = self._joint_angle(meta, i1, i2, i3)
+                if deg is None: continue
+
+                text_color = TXT_LEFT if "L_" in name else TXT_RIGHT
+                display_name = name.replace("_", " ").upper()
+                self._put_text(frame, (15, y_offset), f"{display_name}: {deg}\u00B0", self.font_body, text_color)
+                y_offset += 15
+
+        return frame
+
 class ZmqCameraWorker(QThread):
-    """Background thread for receiving and decoding encrypted camera JSON and JPEGs."""
-    new_frame = pyqtSignal(dict, bytes)
+    """
+    Background thread for receiving camera JSON and JPEGs and composing the showcase frame.
+    Decode, overlay, the single BGR -> RGB conversion and the resize to the panel all happen
+    here, so the GUI thread only wraps the finished buffer and swaps the pixmap.
+    """
+    new_frame = pyqtSignal(np.ndarray)
     error     = pyqtSignal(str)
 
-    def __init__(self, publisher_ip: str):
+    def __init__(self, publisher_ip: str, target_size: tuple[int, int] | None = None):
         super().__init__()
         self.running = True
+        self.overlay = ShowcaseOverlay()
+        self.target_size = target_size   # (width, height) of the panel, kept up to date by the UI
         
         # Configure secure SUB socket
         self.context = zmq.Context()
@@ -132,12 +278,29 @@ class ZmqCameraWorker(QThread):
                 msg_parts = self.socket.recv_multipart(flags=zmq.NOBLOCK)
                 if len(msg_parts) == 2:
                     meta_dict = json.loads(msg_parts[0].decode('utf-8'))
-                    img_bytes = msg_parts[1]
-                    self.new_frame.emit(meta_dict, img_bytes)
+                    frame = cv2.imdecode(np.frombuffer(msg_parts[1], np.uint8), cv2.IMREAD_COLOR)
+                    if frame is None: continue
+
+                    self.overlay.draw(frame, meta_dict)
+                    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                    self.new_frame.emit(self._fit(rgb))
                     
             except Exception as e:
                 self.error.emit(str(e))
 
+    def _fit(self, rgb: np.ndarray) -> np.ndarray:
+        """Resizes the frame to the panel, keeping its aspect ratio."""
+        target = self.target_size
+        if target is None or target[0] <= 0 or target[1] <= 0:
+            return rgb
+        img_h, img_w = rgb.shape[:2]
+        scale = min(target[0] / img_w, target[1] / img_h)
+        size = (max(1, round(img_w * scale)), max(1, round(img_h * scale)))
+        if size == (img_w, img_h):
+            return rgb
+        interp = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+        return cv2.resize(rgb, size, interpolation=interp)
+
     def stop(self):
         self.running = False
         self.wait()
@@ -166,6 +329,7 @@ class LiveViewerWindow(QMainWindow):
         # Cache physical bounds for the radar axes
         self.max_range_val = min(int(MAX_RANGE / self.cfg.rangeRes), self.cfg.numRangeBins) * self.cfg.rangeRes
         self.dop_max = self.cfg.dopMax
+        self.half_cell = self.dop_max / self.cfg.numLoops
         
         self._precompute_zoom() 
         self._build_ui()
@@ -226,139 +390,36 @@ class LiveViewerWindow(QMainWindow):
         self.w_radar.new_frame.connect(self._on_radar_frame)
         self.w_radar.start()
 
-        self.w_cam = ZmqCameraWorker(self.publisher_ip)
+        # Seeded from the laid-out label, so even the first frame is scaled on the worker
+        self.centralWidget().layout().activate()
+        self.w_cam = ZmqCameraWorker(self.publisher_ip, self._cam_target())
         self.w_cam.new_frame.connect(self._on_cam_frame)
+        self.lbl_cam_feed.installEventFilter(self)
         self.w_cam.start()
 
+    def _cam_target(self) -> tuple[int, int]:
+        return (self.lbl_cam_feed.width(), self.lbl_cam_feed.height())
+
+    def eventFilter(self, obj, event):
+        """Hands every camera panel resize to the worker before the next frame is decoded."""
+        if obj is self.lbl_cam_feed and event.type() == QEvent.Type.Resize:
+            self.w_cam.target_size = self._cam_target()
+        return super().eventFilter(obj, event)
+
     def _on_radar_frame(self, smooth_matrix: np.ndarray, lo: float, hi: float):
         """Render radar frame and enforce axis alignment bounds."""
         self.img_radar.setImage(smooth_matrix, autoLevels=False, levels=(lo, hi))
+        # Doppler cells are centred on their bin velocity (DC at 0 m/s), hence the half-cell shift
         align_rect = pg.QtCore.QRectF(
-            -self.dop_max, 0, self.dop_max * 2.0, self.max_range_val
+            -self.dop_max - self.half_cell, 0, self.dop_max * 2.0, self.max_range_val
         )
         self.img_radar.setRect(align_rect)
 
-    def _draw_showcase_overlay(self, frame, meta: dict):
-        """Draws the full MediaPipe skeleton and a compact HD Telemetry Sidebar."""
-        
-        conns = [
-            (0,1), (1,2), (2,3), (3,7), (0,4), (4,5), (5,6), (6,8), (9,10), # Face
-            (11,12), (11,13), (13,15), (15,17), (15,19), (15,21), (17,19),  # Left Arm/Hand
-            (12,14), (14,16), (16,18), (16,20), (16,22), (18,20),           # Right Arm/Hand
-            (11,23), (12,24), (23,24),                                      # Torso
-            (23,25), (25,27), (27,29), (29,31), (31,27),                    # Left Leg/Foot
-            (24,26), (26,28), (28,30), (30,32), (32,28)                     # Right Leg/Foot
-        ]
-        
-        angles_to_track = {
-            'L_Knee': (23, 25, 27), 'R_Knee': (24, 26, 28),
-            'L_Elbow': (11, 13, 15), 'R_Elbow': (12, 14, 16)
-        }
-
-        # OpenCV BGR Colors for shapes
-        CV_LEFT = (0, 165, 255)     
-        CV_RIGHT = (255, 130, 0)    
-        CV_CENTER = (255, 255, 255) 
-
-        # 1. Draw Skeleton Lines (Underneath)
-        for p1, p2 in conns:
-            if f"j{p1}_px" in meta and f"j{p2}_px" in meta:
-                pt1 = (int(meta[f"j{p1}_px"]), int(meta[f"j{p1}_py"]))
-                pt2 = (int(meta[f"j{p2}_px"]), int(meta[f"j{p2}_py"]))
-                cv2.line(frame, pt1, pt2, (220, 220, 220), 2, cv2.LINE_AA)
-
-        # 2. Draw Side-Coded Joints (On Top)
-        for i in range(33):
-            if f"j{i}_px" in meta and f"j{i}_py" in meta:
-                cx, cy = int(meta[f"j{i}_px"]), int(meta[f"j{i}_py"])
-                
-                if i == 0: dot_color = CV_CENTER
-                elif i % 2 != 0: dot_color = CV_LEFT
-                else: dot_color = CV_RIGHT
-                
-                cv2.circle(frame, (cx, cy), 5, (255, 255, 255), 2, cv2.LINE_AA) 
-                cv2.circle(frame, (cx, cy), 4, dot_color, -1, cv2.LINE_AA)      
-
-        # 3. Compact HUD Sidebar Background Panel
-        overlay = frame.copy()
-        # Shrunk the box to be much tighter around the text
-        cv2.rectangle(overlay, (10, 10), (130, 200), (0, 0, 0), -1)
-        cv2.addWeighted(overlay, 1, frame, 0.2, 0, frame)
-
-        # ==========================================
-        # 4. HD TEXT RENDERING (Pillow)
-        # ==========================================
-        
-        # Convert OpenCV's BGR image to RGB for Pillow
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        pil_img = Image.fromarray(frame_rgb)
-        draw = ImageDraw.Draw(pil_img)
-
-        # Slightly smaller fonts for the compact layout
-        try:
-            font_title = ImageFont.truetype("roboto.ttf", 12)
-            font_body = ImageFont.truetype("roboto.ttf", 10)
-        except IOError:
-            font_title = ImageFont.load_default()
-            font_body = ImageFont.load_default()
-
-        # Brightened RGB Colors for contrast against the black box
-        RGB_LEFT = (255, 180, 50)      # Bright Orange
-        RGB_RIGHT = (100, 200, 255)    # Light Sky Blue
-
-        # Draw Header (Removed Stroke)
-        draw.text((15, 15), "Metrics", font=font_title, fill=(255, 255, 255))
-
-        y_offset = 30
-        for name, (i1, i2, i3) in angles_to_track.items():
-            if all(f"j{i}_x" in meta for i in [i1, i2, i3]):
-                
-                # Biomechanical Math
-                v1 = np.array([meta[f"j{i1}_x"], meta[f"j{i1}_y"], meta[f"j{i1}_z"]])
-                v2 = np.array([meta[f"j{i2}_x"], meta[f"j{i2}_y"], meta[f"j{i2}_z"]])
-                v3 = np.array([meta[f"j{i3}_x"], meta[f"j{i3}_y"], meta[f"j{i3}_z"]])
-                
-                ba, bc = v1 - v2, v3 - v2
-                n_ba, n_bc = np.linalg.norm(ba), np.linalg.norm(bc)
-                
-                if n_ba == 0 or n_bc == 0: continue
-                    
-                cosine = np.dot(ba, bc) / (n_ba * n_bc)
-                deg = int(np.degrees(np.arccos(np.clip(cosine, -1.0, 1.0))))
-                
-                text_color = RGB_LEFT if "L_" in name else RGB_RIGHT
-                display_name = name.replace("_", " ").upper()
-                
-                # Draw Crisp Data text (Removed Stroke, tightened y_offset)
-                draw.text((15, y_offset), f"{display_name}: {deg}\u00B0", font=font_body, fill=text_color)
-                y_offset += 15
-
-        # Convert back to OpenCV format so PyQt can display it
-        frame = cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
-        return frame
-
-    def _on_cam_frame(self, meta: dict, img_bytes: bytes):
-        """Decode JPEG payload, draw overlay, and update UI Pixmap."""
-        # 1. Decode raw bytes into OpenCV Image
-        np_arr = np.frombuffer(img_bytes, np.uint8)
-        frame = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
-
-        # 2. Draw the skeleton using the pixel coordinates from the JSON
-        frame = self._draw_showcase_overlay(frame, meta)
-
-        # 3. Convert OpenCV BGR back to PyQt RGB format
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    def _on_cam_frame(self, rgb: np.ndarray):
+        """Wrap the worker's finished RGB frame and swap the UI Pixmap."""
         img_h, img_w, ch = rgb.shape
-        bytes_per_line = ch * img_w
-        
-        qt_img = QImage(rgb.data, img_w, img_h, bytes_per_line, QImage.Format.Format_RGB888)
-        pixmap = QPixmap.fromImage(qt_img)
-        
-        # 4. Scale and set
-        lbl_w = self.lbl_cam_feed.width()
-        lbl_h = self.lbl_cam_feed.height()
-        if lbl_w > 0 and lbl_h > 0:
-            self.lbl_cam_feed.setPixmap(pixmap.scaled(lbl_w, lbl_h, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+        qt_img = QImage(rgb.data, img_w, img_h, ch * img_w, QImage.Format.Format_RGB888)
+        self.lbl_cam_feed.setPixmap(QPixmap.fromImage(qt_img))
 
     def closeEvent(self, event):
         """Terminate networking safely before UI closes."""
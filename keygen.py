@@ -21,8 +21,9 @@ def run():
         'Hardware': {'radar_cfg_file': 'core/radar/config.cfg', 'cli_port': 'auto', 'data_port': 'auto'},
         'Network': {'zmq_radar_port': '5555', 'zmq_camera_port': '5556'},
         'Recording': {'chunk_size': '50'},
-        'Viewer': {'default_ip': '127.0.0.1', 'max_range_m': '5.0', 'cmap': 'inferno', 'low_pct': '40.0', 'high_pct': '99.5', 'smooth_grid_size': '250'},
-        'Camera': {'width': '640', 'height': '480', 'fps': '30', 'model_complexity': '1', 'jpeg_quality': '80', 'auto_exposure': 'False', 'exposure': '450'}
+        'Cache': {'radar_cache_dir': 'cache/radar', 'radar_cache_mb': '2048'},
+        'Viewer': {'default_ip': '127.0.0.1', 'max_range_m': '5.0', 'cmap': 'inferno', 'low_pct': '40.0', 'high_pct': '99.5', 'smooth_grid_size': '250', 'clutter_alpha': '0', 'show_detections': 'True', 'waterfall_s': '10.0', 'waterfall_lo_m': '0.0', 'waterfall_hi_m': '5.0', 'ui_fps': '30'},
+        'Camera': {'width': '640', 'height': '480', 'fps': '30', 'model_complexity': '1', 'jpeg_quality': '80', 'auto_exposure': 'False', 'exposure': '450', 'sparse_depth': 'False', 'pose_tracking': 'True'}
     }
 
     # 2. Load defaults into the parser
@@ -11,9 +11,12 @@ class RealSenseCamera:
     Hardware driver for the Intel RealSense Depth Camera.
     Handles stream configuration, frame alignment (matching 2D RGB to 3D Depth),
     and hardware-accelerated post-processing filters.
+    With sparse_depth=True the full-frame align and filters are skipped: depth stays in
+    its own camera and only the landmark pixels are mapped across (see SparseDepthMapper).
     """
-    def __init__(self, width=640, height=480, fps=30):
+    def __init__(self, width=640, height=480, fps=30, sparse_depth=False):
         self.pipeline = None
+        self.sparse_depth = sparse_depth
         
         # ── Read Settings from INI ──
         config = configparser.ConfigParser()
@@ -40,11 +43,20 @@ class RealSenseCamera:
             # ── HARDWARE FILTERS ──
             self.spatial = rs.spatial_filter()
             self.temporal = rs.temporal_filter()
+
+            # ── CALIBRATION (for sparse color -> depth mapping) ──
+            depth_profile = self.profile.get_stream(rs.stream.depth).as_video_stream_profile()
+            color_profile = self.profile.get_stream(rs.stream.color).as_video_stream_profile()
+            self.depth_intrin = depth_profile.get_intrinsics()
+            self.color_intrin = color_profile.get_intrinsics()
+            self.depth_to_color = depth_profile.get_extrinsics_to(color_profile)
+            self.color_to_depth = color_profile.get_extrinsics_to(depth_profile)
             
             # ── EXPOSURE CONTROL ──
             self._configure_exposure(auto_exposure, manual_exposure)
             
-            log.info(f"RealSense started successfully at {width}x{height} @ {fps} FPS")
+            log.info(f"RealSense started successfully at {width}x{height} @ {fps} FPS"
+                     f"{' (sparse depth)' if sparse_depth else ''}")
             
         except Exception as e:
             log.error(f"Camera hardware initialization failed: {e}")
@@ -67,12 +79,22 @@ class RealSenseCamera:
                     log.info(f"RGB Camera Auto-Exposure: DISABLED (Locked to {manual_exposure})")
 
     def get_frames(self):
-        """Pulls the newest frame from the USB buffer, aligns it, and applies DSP filters."""
+        """
+        Pulls the newest frame from the USB buffer, aligns it, and applies DSP filters.
+        In sparse mode the raw, unaligned depth frame is returned instead.
+        """
         if not self.pipeline: 
             return None, None
             
         try:
             frames = self.pipeline.wait_for_frames(timeout_ms=1000)
+            if self.sparse_depth:
+                color_frame = frames.get_color_frame()
+                depth_frame = frames.get_depth_frame()
+                if not color_frame or not depth_frame:
+                    return None, None
+                return np.asanyarray(color_frame.get_data()), depth_frame
+
             aligned = self.align.process(frames)
             
             color_frame = aligned.get_color_frame()
@@ -0,0 +1,220 @@
+import os
+import pty
+import sys
+import tty
+import time
+import select
+import struct
+import logging
+import argparse
+import threading
+
+import pyarrow.parquet as pq
+
+from core.radar.parser import RadarConfig, TLV_RANGE_DOPPLER_HEAT_MAP
+
+log = logging.getLogger("RadarReplay")
+
+# Same 8-byte sync word the real sensor (and RadarSensor) uses
+_MAGIC = b"\x02\x01\x04\x03\x06\x05\x08\x07"
+
+# Packet header layout expected by parse_standard_frame():
+#   magic, version, totalPacketLen, platform, frameNumber,
+#   timeCpuCycles, numDetectedObj, numTLVs, subFrameNumber
+_HEADER_FMT  = "<Q8I"
+_TI_VERSION  = 0x03050004
+_TI_PLATFORM = 0x000A6843
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Packet Sources
+#  Radar sessions only store the RDHM payload, so we rebuild a TI packet around
+#  it. Raw captures (.bin/.dat dumps of the DATA port) are replayed verbatim.
+# ─────────────────────────────────────────────────────────────────────────────
+
+def build_packet(rdhm_bytes: bytes, frame_number: int) -> bytes:
+    """Wraps one RDHM payload into a single-TLV TI mmWave demo packet."""
+    tlv = struct.pack("<2I", TLV_RANGE_DOPPLER_HEAT_MAP, len(rdhm_bytes)) + rdhm_bytes
+    total_len = struct.calcsize(_HEADER_FMT) + len(tlv)
+    header = struct.pack(_HEADER_FMT, int.from_bytes(_MAGIC, "little"), _TI_VERSION, total_len,
+                         _TI_PLATFORM, frame_number, 0, 0, 1, 0)
+    return header + tlv
+
+
+def load_packets(path: str, cfg: RadarConfig) -> list[bytes]:
+    """Loads every replayable packet from a radar session Parquet or a raw DATA port dump."""
+    if path.endswith(".parquet"):
+        exp_bytes = cfg.numRangeBins * cfg.numLoops * 2
+        payloads = pq.read_table(path, columns=["rdhm_bytes"]).column("rdhm_bytes").to_pylist()
+
+        # Skip the same corrupted rows RecordingSession would drop
+        payloads = [p for p in payloads if p is not None and len(p) == exp_bytes]
+        return [build_packet(p, i) for i, p in enumerate(payloads)]
+
+    with open(path, "rb") as f:
+        blob = f.read()
+
+    packets = []
+    idx = blob.find(_MAGIC)
+    while idx != -1:
+        nxt = blob.find(_MAGIC, idx + len(_MAGIC))
+        packets.append(blob[idx:nxt if nxt != -1 else len(blob)])
+        idx = nxt
+    return packets
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Virtual Device
+# ─────────────────────────────────────────────────────────────────────────────
+
+class VirtualRadar:
+    """
+    Emulates an IWR6843ISK on two Linux pseudo-terminals.
+    The CLI port acknowledges every command with 'Done', and the DATA port
+    replays recorded packets once the host sends 'sensorStart'.
+    speed = 1.0 replays at the configured frame rate, N replays N times faster,
+    and 0 pushes packets as fast as the reader drains them.
+    """
+
+    def __init__(self, packets: list[bytes], frame_rate: float, speed: float = 1.0, loop: bool = True):
+        if not packets:
+            raise ValueError("No packets to replay.")
+
+        self.packets = packets
+        self.period = 0.0 if speed <= 0 else 1.0 / (frame_rate * speed)
+        self.loop = loop
+
+        # One pty pair per physical port. We keep the slave ends open ourselves so
+        # the masters never see EIO while RadarSensor reconnects.
+        self._cli_master, self._cli_slave = pty.openpty()
+        self._data_master, self._data_slave = pty.openpty()
+        for fd in (self._cli_slave, self._data_slave):
+            tty.setraw(fd)   # No echo, no CR/LF translation of binary frames
+
+        self.cli_port  = os.ttyname(self._cli_slave)
+        self.data_port = os.ttyname(self._data_slave)
+
+        self.frames_sent = 0
+        self._streaming = threading.Event()
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._serve_cli, daemon=True),
+            threading.Thread(target=self._serve_data, daemon=True),
+        ]
+
+    def start(self):
+        for t in self._threads:
+            t.start()
+
+    def stop(self):
+        self._running = False
+        self._streaming.clear()
+        for t in self._threads:
+            t.join(timeout=1.0)
+        for fd in (self._cli_master, self._cli_slave, self._data_master, self._data_slave):
+            os.close(fd)
+
+    # ── 1. CLI Port ──────────────────────────────────────────────────────────
+
+    def _serve_cli(self):
+        """Reads newline-terminated commands and answers like the TI demo firmware."""
+        pending = b""
+        while self._running:
+            ready, _, _ = select.select([self._cli_master], [], [], 0.1)
+            if not ready:
+                continue
+
+            pending += os.read(self._cli_master, 1024)
+            while b"\n" in pending:
+                line, pending = pending.split(b"\n", 1)
+                cmd = line.decode(errors="ignore").strip()
+                if not cmd:
+                    continue
+
+                if cmd.startswith("sensorStart"):
+                    self._streaming.set()
+                elif cmd.startswith("sensorStop"):
+                    self._streaming.clear()
+
+                os.write(self._cli_master, f"{cmd}\nDone\n".encode())
+
+    # ── 2. DATA Port ─────────────────────────────────────────────────────────
+
+    def _serve_data(self):
+        """Writes packets on a drift-free schedule (or back-to-back when period is 0)."""
+        idx = 0
+        next_t = time.perf_counter()
+        report_t, report_frames = next_t, 0
+
+        while self._running:
+            if not self._streaming.wait(timeout=0.1):
+                next_t = time.perf_counter()
+                continue
+
+            if idx >= len(self.packets):
+                if not self.loop:
+                    log.info("Replay finished.")
+                    self._streaming.clear()
+                    continue
+                idx = 0
+
+            if self.period > 0:
+                delay = next_t - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                next_t += self.period
+
+            if not self._write_all(self.packets[idx]):
+                continue
+            idx += 1
+            self.frames_sent += 1
+
+            now = time.perf_counter()
+            if now - report_t >= 5.0:
+                log.info(f"Replaying at {(self.frames_sent - report_frames) / (now - report_t):.1f} FPS")
+                report_t, report_frames = now, self.frames_sent
+
+    def _write_all(self, packet: bytes) -> bool:
+        """Blocks until the packet is in the pty buffer. Returns False if we were stopped."""
+        view = memoryview(packet)
+        while view and self._running:
+            _, ready, _ = select.select([], [self._data_master], [], 0.1)
+            if ready:
+                view = view[os.write(self._data_master, view):]
+        return not view
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s", datefmt="%H:%M:%S")
+
+    parser = argparse.ArgumentParser(description="Replay a radar recording through virtual serial ports.")
+    parser.add_argument("recording", help="radar_session_*.parquet or a raw DATA port dump")
+    parser.add_argument("--cfg", default="core/radar/config.cfg", help="Radar profile used to pace the replay")
+    parser.add_argument("--speed", type=float, default=1.0, help="Rate multiplier (0 = as fast as possible)")
+    parser.add_argument("--once", action="store_true", help="Stop after one pass instead of looping")
+    args = parser.parse_args()
+
+    cfg = RadarConfig(args.cfg)
+    device = VirtualRadar(load_packets(args.recording, cfg), cfg.frameRate, args.speed, loop=not args.once)
+    device.start()
+
+    print("\n*******************************")
+    print("***** OST VIRTUAL RADAR *****")
+    print("*******************************")
+    print(f"  {len(device.packets)} packets @ {'max' if args.speed <= 0 else f'{cfg.frameRate * args.speed:.1f}'} FPS")
+    print(f"  cli_port  = {device.cli_port}")
+    print(f"  data_port = {device.data_port}")
+    print("*******************************\n")
+
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        log.info(f"Stopping replay after {device.frames_sent} frames...")
+    finally:
+        device.stop()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
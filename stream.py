@@ -7,6 +7,7 @@ import zmq
 import json
 import configparser
 import cv2
+import numpy as np
 from core.radar.parser import parse_standard_frame
 from core.io.storage import CameraSessionWriter, RadarSessionWriter
 from core.ui.theme import APP_VERSION, SETTINGS_PATH
@@ -27,6 +28,7 @@ HW_CLI_PORT = config['Hardware']['cli_port']
 HW_DATA_PORT = config['Hardware']['data_port']
 ZMQ_RADAR_PORT = config['Network'].get('zmq_radar_port', '5555')
 ZMQ_CAM_PORT = config['Network'].get('zmq_camera_port', '5556')
+PIPELINE_REPORT_S = 5.0  # How often the camera pipeline logs its per-stage timing
 
 # Load Curve25519 encryption keys for the server
 SERVER_PUBLIC = config['Security']['server_public'].encode('ascii')
@@ -105,21 +107,29 @@ def run_camera_stream(zmq_context: zmq.Context, record: bool):
     log.info("Initializing RealSense and MediaPipe...")
     
     from sensors.realsense import RealSenseCamera
-    from core.cv.depth import get_mean_depth, deproject_pixel_to_point
+    from core.cv.depth import depth_buffer, sample_depths, deproject_pixels, SparseDepthMapper
     from core.cv.pose import PoseEstimator
+    from core.io.pipeline import FramePipeline, Packet
     
     cam_w = int(config.get('Camera', 'width', fallback=640))
     cam_h = int(config.get('Camera', 'height', fallback=480))
     cam_fps = int(config.get('Camera', 'fps', fallback=30))
     model_comp = int(config.get('Camera', 'model_complexity', fallback=1))
     jpeg_qual = int(config.get('Camera', 'jpeg_quality', fallback=80))
+    sparse_depth = config.getboolean('Camera', 'sparse_depth', fallback=False)
+    pose_tracking = config.getboolean('Camera', 'pose_tracking', fallback=True)
     
-    cam = RealSenseCamera(width=cam_w, height=cam_h, fps=cam_fps)
+    cam = RealSenseCamera(width=cam_w, height=cam_h, fps=cam_fps, sparse_depth=sparse_depth)
     if cam.pipeline is None:
         log.error("Camera detection failed.")
         return
 
-    pose = PoseEstimator(model_complexity=model_comp)
+    # Sparse mode: only the landmark pixels are mapped into the unaligned depth frame
+    mapper = None
+    if sparse_depth:
+        mapper = SparseDepthMapper(cam.depth_intrin, cam.color_intrin, cam.depth_to_color, cam.color_to_depth)
+
+    pose = PoseEstimator(model_complexity=model_comp, tracking=pose_tracking)
     
     # Configure secure PUB socket
     zmq_socket = zmq_context.socket(zmq.PUB)
@@ -134,51 +144,92 @@ def run_camera_stream(zmq_context: zmq.Context, record: bool):
         meta = {"Date": datetime.datetime.now().isoformat()}
         writer = CameraSessionWriter(metadata=meta)
     
-    log.info(f"{'RECORD' if record else 'PREVIEW'} MODE: Camera stream active.")
+    # ── Pipeline stages (each one runs on its own thread) ──
+    def capture():
+        color_img, depth_frame = cam.get_frames()
+        if color_img is None:
+            time.sleep(0.01)
+            return None
+        return Packet(time.time(), {"color": color_img, "depth": depth_frame})
 
-    try:
-        while True:
-            color_img, depth_frame = cam.get_frames()
-            if color_img is None:
-                time.sleep(0.01)
-                continue
+    def infer(pkt: Packet):
+        pkt.data["landmarks"] = pose.estimate(pkt.data["color"])
+        return pkt
 
-            h, w, _ = color_img.shape
-            landmarks = pose.estimate(color_img)
-            frame_data = {"timestamp": time.time()}
-            
-            depth_intrin = depth_frame.profile.as_video_stream_profile().intrinsics if depth_frame else None
-
-            # Process 3D coordinates for skeleton joints
-            if landmarks:
-                for i, (lx, ly, lz) in enumerate(landmarks):
-                    cx, cy = int(lx), int(ly)
-                    if 0 <= cx < w and 0 <= cy < h:
-                        #cv2.circle(color_img, (cx, cy), 3, (0, 255, 0), -1)
-                        if depth_intrin:
-                            dist = get_mean_depth(depth_frame, cx, cy, w, h)
-                            if dist:
-                                p = deproject_pixel_to_point(depth_intrin, cx, cy, dist)
-                                frame_data[f"j{i}_x"], frame_data[f"j{i}_y"], frame_data[f"j{i}_z"] = p
-                                frame_data[f"j{i}_px"] = cx
-                                frame_data[f"j{i}_py"] = cy
-
-            # Compress video frame to JPEG payload
-            ret, jpeg_buffer = cv2.imencode('.jpg', color_img, [int(cv2.IMWRITE_JPEG_QUALITY), jpeg_qual])
-            
-            if ret:
-                zmq_socket.send_multipart([
-                    json.dumps(frame_data).encode('utf-8'),
-                    jpeg_buffer.tobytes()
-                ])
+    def locate(pkt: Packet):
+        color_img, depth_frame, landmarks = pkt.data["color"], pkt.data["depth"], pkt.data["landmarks"]
+        h, w, _ = color_img.shape
+        frame_data = {"timestamp": pkt.timestamp}
+        
+        depth_intrin = depth_frame.profile.as_video_stream_profile().intrinsics if depth_frame else None
+
+        # Process 3D coordinates for skeleton joints, all landmarks in one batch
+        if landmarks is not None and depth_intrin:
+            depth, units = depth_buffer(depth_frame)
+            if depth is not None:
+                pix = landmarks[:, :2].astype(np.intp)
+                cx, cy = pix[:, 0], pix[:, 1]
+                on_screen = (cx >= 0) & (cx < w) & (cy >= 0) & (cy < h)
+
+                if mapper is not None:
+                    all_points = mapper.landmark_points(depth, units, cx, cy)
+                    found = np.flatnonzero(on_screen & np.isfinite(all_points[:, 2]))
+                    points = all_points[found]
+                else:
+                    dist = sample_depths(depth, units, cx, cy)
+                    found = np.flatnonzero(on_screen & (dist > 0))
+                    points = deproject_pixels(depth_intrin, cx[found], cy[found], dist[found])
 
-            if record and writer:
-                writer.write_frame(frame_data)
+                for i, (px, py), (x, y, z) in zip(found.tolist(), pix[found].tolist(), points.tolist()):
+                    frame_data[f"j{i}_x"], frame_data[f"j{i}_y"], frame_data[f"j{i}_z"] = x, y, z
+                    frame_data[f"j{i}_px"] = px
+                    frame_data[f"j{i}_py"] = py
+        elif mapper is not None:
+            mapper.reset()   # Person lost: do not blend the next one into the old depths
+
+        # Record here, ahead of the latest-wins hops to encode/publish that may drop frames
+        if record and writer:
+            writer.write_frame(frame_data)
+
+        # Release the RealSense frame early so the SDK can recycle its buffer
+        pkt.data = {"color": color_img, "meta": frame_data}
+        return pkt
+
+    def encode(pkt: Packet):
+        # Compress video frame to JPEG payload
+        ret, jpeg_buffer = cv2.imencode('.jpg', pkt.data["color"], [int(cv2.IMWRITE_JPEG_QUALITY), jpeg_qual])
+        if not ret: return None
+        pkt.data = {"meta": pkt.data["meta"], "jpeg": jpeg_buffer.tobytes()}
+        return pkt
+
+    def publish(pkt: Packet):
+        frame_data = pkt.data["meta"]
+        zmq_socket.send_multipart([
+            json.dumps(frame_data).encode('utf-8'),
+            pkt.data["jpeg"]
+        ])
+        return pkt
+
+    pipeline = FramePipeline(
+        source=("capture", capture),
+        stages=[("pose", infer), ("depth", locate), ("encode", encode), ("publish", publish)],
+        # Recording: every pose result must reach the writer in the depth stage, so that hop queues
+        lossless=("depth",) if record else (),
+    )
+    
+    log.info(f"{'RECORD' if record else 'PREVIEW'} MODE: Camera stream active.")
+
+    try:
+        pipeline.start()
+        while pipeline.is_alive():
+            time.sleep(PIPELINE_REPORT_S)
+            log.info(f"Pipeline: {pipeline.report()}")
 
     except KeyboardInterrupt:
         log.info("Stopping camera stream...")
     finally:
-        # Safely release hardware and network bindings
+        # Stop the stage threads before releasing the hardware and network bindings they use
+        pipeline.stop()
         cam.stop()
         zmq_socket.close() 
         if writer: writer.close()
@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+import pytest
+
+from core.radar.parser import RadarConfig
+from core.radar.cfar import CFARDetector
+
+CFG_FILE = os.path.join(os.path.dirname(__file__), "..", "core", "radar", "config.cfg")
+
+
+@pytest.fixture(scope="module")
+def cfg():
+    return RadarConfig(CFG_FILE)
+
+
+@pytest.mark.parametrize("r_bin, shifted_col", [(20, 5), (0, 16), (63, 31), (7, 0)])
+def test_detection_lands_on_cell_centre(cfg, r_bin, shifted_col):
+    """A lone target in a flat noise floor is reported at its bin's range centre and Doppler velocity."""
+    nr, nv = cfg.numRangeBins, cfg.numLoops
+    frame = np.full((nr, nv), 100, dtype=np.uint16)
+
+    # The detector takes raw FFT order; fftshift puts raw bin (col + nv/2) % nv at column col
+    frame[r_bin, (shifted_col + nv // 2) % nv] = 20000
+
+    dets = CFARDetector(cfg).detect(frame)
+    assert dets.shape == (1, 3)
+
+    cell_v = 2.0 * cfg.dopMax / nv
+    assert dets[0, 0] == pytest.approx((r_bin + 0.5) * cfg.rangeRes, rel=1e-5)
+    assert dets[0, 1] == pytest.approx((shifted_col - nv // 2) * cell_v, rel=1e-5, abs=1e-5)
+    assert dets[0, 2] > 0
+
+
+def test_stationary_bin_is_zero_velocity(cfg):
+    """The fftshifted DC bin is exactly 0 m/s, so a static reflector is never reported as moving."""
+    nr, nv = cfg.numRangeBins, cfg.numLoops
+    frame = np.full((nr, nv), 100, dtype=np.uint16)
+    frame[10, 0] = 20000   # Raw bin 0 = DC
+
+    dets = CFARDetector(cfg).detect(frame)
+    assert dets.shape == (1, 3)
+    assert dets[0, 1] == 0.0
+    assert cfg.velocity_axis()[nv // 2] == 0.0
+
+
+def test_axes_match_heatmap_extent(cfg):
+    """Velocity bins run from -dopMax to dopMax - one cell; range centres sit inside [0, rangeMax]."""
+    v = cfg.velocity_axis()
+    r = cfg.range_axis()
+    cell_v = 2.0 * cfg.dopMax / cfg.numLoops
+
+    assert v.size == cfg.numLoops and r.size == cfg.numRangeBins
+    assert v[0] == pytest.approx(-cfg.dopMax, rel=1e-5)
+    assert v[-1] == pytest.approx(cfg.dopMax - cell_v, rel=1e-5)
+    assert r[-1] == pytest.approx(cfg.rangeMax - cfg.rangeRes / 2, rel=1e-5)
+    np.testing.assert_allclose(np.diff(v), cell_v, rtol=1e-4)
@@ -1,18 +1,24 @@
 import sys
+import time
 import logging
 import os
+import threading
 import zmq
 import json
 import numpy as np
-import scipy.ndimage as ndimage
 import pyqtgraph as pg
 import configparser
 
-from PyQt6.QtCore import QThread, pyqtSignal, Qt
-from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QHBoxLayout, QLabel
-from PyQt6.QtGui import QPixmap, QIcon
+from PyQt6.QtCore import QThread, QTimer, QBuffer, QByteArray, QIODevice, QSize, pyqtSignal, Qt
+from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QGridLayout, QLabel
+from PyQt6.QtGui import QPixmap, QIcon, QImage, QImageReader
 
+from core.io.mailbox import LatestMailbox
 from core.radar.parser import RadarConfig
+from core.radar.lut import DecibelLUT
+from core.radar.live import WaterfallBuffer, LiveCadence, ContrastTracker
+from core.radar.clutter import ClutterMap
+from core.radar.cfar import CFARDetector
 from core.ui.theme import COLOR_MAIN_BG, COLOR_TEXT, APP_VERSION, ICON_PATH, SETTINGS_PATH
 
 # Setup terminal logging
@@ -35,237 +41,449 @@ MAX_RANGE       = float(config['Viewer']['max_range_m'])
 CMAP            = config['Viewer']['cmap']
 DISP_LOW_PCT    = float(config['Viewer']['low_pct'])
 DISP_HIGH_PCT   = float(config['Viewer']['high_pct'])
-SMOOTH_GRID     = int(config['Viewer']['smooth_grid_size'])
+CLUTTER_ALPHA   = float(config['Viewer'].get('clutter_alpha', '0'))
+SHOW_DETECTIONS = config['Viewer'].getboolean('show_detections', fallback=True)
+WATERFALL_S     = float(config['Viewer'].get('waterfall_s', '10.0'))
+WATERFALL_LO_M  = float(config['Viewer'].get('waterfall_lo_m', '0.0'))
+WATERFALL_HI_M  = float(config['Viewer'].get('waterfall_hi_m', str(MAX_RANGE)))
+UI_FPS          = float(config['Viewer'].get('ui_fps', '30'))
 
 # Load Curve25519 encryption keys for the client
 SERVER_PUBLIC = config['Security']['server_public'].encode('ascii')
 CLIENT_PUBLIC = config['Security']['client_public'].encode('ascii')
 CLIENT_SECRET = config['Security']['client_secret'].encode('ascii')
 
-class ZmqRadarWorker(QThread):
-    """Background thread for receiving and processing encrypted radar matrices."""
-    new_frame = pyqtSignal(np.ndarray, float, float) 
-    error     = pyqtSignal(str)
+# ── 1. Per-Stream Processing ─────────────────────────────────────────────────
 
-    def __init__(self, cfg: RadarConfig, publisher_ip: str, zoom_y: float, zoom_x: float):
-        super().__init__()
+class RadarStream:
+    """
+    DSP state for one node's radar stream: clutter map, CFAR, waterfall, cadence and contrast.
+    handle() is called by the hub thread for every message, and finished frames go into a
+    latest-wins mailbox that the UI drains on its own timer. The waterfall history is not
+    part of the frame: the UI copies it once per rendered frame (waterfall_snapshot).
+    """
+    def __init__(self, cfg: RadarConfig):
         self.cfg = cfg
-        self.running = True
-        self.zoom_y = zoom_y
-        self.zoom_x = zoom_x
+        self.mailbox = LatestMailbox()
         
         self.num_range_bins = cfg.numRangeBins
         self.num_vel_bins   = cfg.numLoops
         self.max_bin = min(int(MAX_RANGE / cfg.rangeRes), cfg.numRangeBins)
         self._expected_size = self.num_range_bins * self.num_vel_bins
 
-        # Configure secure SUB socket
-        self.context = zmq.Context()
-        self.socket = self.context.socket(zmq.SUB)
-        self.socket.curve_secretkey = CLIENT_SECRET
-        self.socket.curve_publickey = CLIENT_PUBLIC
-        self.socket.curve_serverkey = SERVER_PUBLIC
+        # uint16 -> dB (with fftshift) through a precomputed table, one gather per frame
+        self.to_db = DecibelLUT(self.num_vel_bins, eps=1e-6)
 
-        self.socket.connect(f"tcp://{publisher_ip}:{ZMQ_RADAR_PORT}")
-        self.socket.setsockopt_string(zmq.SUBSCRIBE, "")
+        # Range gate collapsed into one Doppler row per frame for the live waterfall
+        self.wf_lo = min(max(0, int(WATERFALL_LO_M / cfg.rangeRes)), self.max_bin - 1)
+        self.wf_hi = min(self.max_bin, max(self.wf_lo + 1, int(WATERFALL_HI_M / cfg.rangeRes)))
 
-    def run(self):
-        while self.running:
-            try:
-                if self.socket.poll(100) == 0:
-                    continue 
-
-                msg = self.socket.recv(flags=zmq.NOBLOCK)
-                raw = np.frombuffer(msg, dtype=np.uint16)
-                
-                if raw.size != self._expected_size: continue
-
-                # Calculate radar heatmap (dB) and upsample for rendering
-                rd = raw.astype(np.float32).reshape(self.num_range_bins, self.num_vel_bins)
-                rd = rd[:self.max_bin, :]
-                display = 20.0 * np.log10(np.abs(np.fft.fftshift(rd, axes=1)) + 1e-6)
-                smooth = ndimage.zoom(display, (self.zoom_y, self.zoom_x), order=1)
-                
-                # Dynamic contrast scaling
-                lo = float(np.percentile(smooth, DISP_LOW_PCT))
-                hi = float(np.percentile(smooth, DISP_HIGH_PCT))
-                if lo >= hi: hi = lo + 0.1
-
-                self.new_frame.emit(smooth, lo, hi)
-                
-            except Exception as e:
-                self.error.emit(str(e))
+        # The waterfall history lives here so frames the UI skips still land in it
+        self.waterfall = WaterfallBuffer(int(round(WATERFALL_S * cfg.frameRate)), cfg.numLoops)
+        self._wf_lock = threading.Lock()
 
-    def stop(self):
-        self.running = False
-        self.wait()
-        self.socket.close()
-        self.context.term()
+        # Online cadence from the same gated row, with the band-pass state kept across frames
+        self.cadence = LiveCadence(cfg.frameRate)
 
-class ZmqCameraWorker(QThread):
-    """Background thread for receiving and decoding encrypted camera JSON and JPEGs."""
-    new_frame = pyqtSignal(dict, bytes)
-    error     = pyqtSignal(str)
+        # Display levels from decaying histograms instead of sorting every frame.
+        # The waterfall only adds one row per frame, so its histogram forgets more slowly.
+        self.levels = ContrastTracker(DISP_LOW_PCT, DISP_HIGH_PCT)
+        self.wf_levels = ContrastTracker(DISP_LOW_PCT, DISP_HIGH_PCT, alpha=0.02)
 
-    def __init__(self, publisher_ip: str):
+        # Static clutter suppression, opt-in like Studio and batch (0 disables it)
+        self.clutter = ClutterMap(CLUTTER_ALPHA) if CLUTTER_ALPHA > 0 else None
+
+        # CA-CFAR target detection, cheap enough to run on every frame
+        self.cfar = CFARDetector(cfg) if SHOW_DETECTIONS else None
+        self._no_dets = np.empty((0, 3), dtype=np.float32)
+
+    def handle(self, msg_parts: list[bytes]):
+        if len(msg_parts) != 1: return
+        raw = np.frombuffer(msg_parts[0], dtype=np.uint16)
+        
+        if raw.size != self._expected_size: return
+
+        # Calculate radar heatmap (dB) at native resolution; ImageItem scales it on screen
+        rd = raw.reshape(self.num_range_bins, self.num_vel_bins)[:self.max_bin, :]
+        if self.clutter is not None:
+            # Back to whole RDHM counts so the frame stays uint16 for the dB table
+            rd = np.rint(self.clutter.update(rd)).astype(np.uint16)
+        dets = self.cfar.detect(rd) if self.cfar is not None else self._no_dets
+
+        wf_raw = rd[self.wf_lo:self.wf_hi].max(axis=0)
+        wf_row = self.to_db.convert(wf_raw)
+        with self._wf_lock:
+            self.waterfall.push(wf_row)
+
+        self.mailbox.put({
+            "heatmap": self.to_db.quantize(rd, *self.levels.update(rd)),   # uint8, shown with fixed levels
+            "dets": dets,
+            "wf_levels": self.wf_levels.update(wf_raw),
+            "spm": self.cadence.update(LiveCadence.movement(wf_row)),
+        })
+
+    def waterfall_snapshot(self) -> np.ndarray:
+        """(Velocity, depth) copy of the history for the UI; the hub thread keeps pushing meanwhile."""
+        with self._wf_lock:
+            return self.waterfall.view().copy()
+
+class CameraStream:
+    """
+    Decoder for one node's camera JSON and JPEGs.
+    Frames are decoded straight to the size of the camera panel, so the GUI thread
+    only has to wrap a finished QImage in a pixmap.
+    """
+    def __init__(self):
+        self.mailbox = LatestMailbox()
+        self.target_size = None   # (width, height) of the panel, kept up to date by the UI
+
+    def handle(self, msg_parts: list[bytes]):
+        if len(msg_parts) != 2: return
+        meta_dict = json.loads(msg_parts[0].decode('utf-8'))
+        image = self._decode(msg_parts[1])
+        if not image.isNull():
+            self.mailbox.put((meta_dict, image))
+
+    def _decode(self, img_bytes: bytes) -> QImage:
+        """
+        JPEG -> QImage already fitted to the panel. Asking the reader for a scaled size lets
+        the JPEG decoder drop DCT detail while decoding instead of resizing a full frame after.
+        """
+        buffer = QBuffer()
+        buffer.setData(QByteArray(img_bytes))
+        buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+
+        reader = QImageReader(buffer, b"jpeg")
+        target = self.target_size
+        if target is not None and target[0] > 0 and target[1] > 0:
+            size = reader.size()
+            if size.isValid():
+                size.scale(QSize(*target), Qt.AspectRatioMode.KeepAspectRatio)
+                reader.setScaledSize(size)
+        return reader.read()
+
+# ── 2. Network Hub ───────────────────────────────────────────────────────────
+
+class ZmqHub(QThread):
+    """
+    One background thread serving every encrypted SUB socket of every node.
+    All sockets share a single zmq.Context and are multiplexed through one zmq.Poller,
+    so an idle stream costs nothing and work grows with the number of messages, not
+    with the number of threads. Each ready socket is drained (up to MAX_BURST messages
+    per wake-up, to stay fair to the others) and handed to its stream's handle().
+    Failures are rate-limited here, before they cross into the GUI thread: error emits
+    (label, message) at most once per ERROR_LOG_S per stream, with the skipped count appended.
+    """
+    error     = pyqtSignal(str, str)   # "<ip> radar/camera" (or "poller"), message
+
+    MAX_BURST = 64
+    ERROR_LOG_S = 5.0
+
+    def __init__(self):
         super().__init__()
         self.running = True
-        
-        # Configure secure SUB socket
         self.context = zmq.Context()
-        self.socket = self.context.socket(zmq.SUB)
-        self.socket.curve_secretkey = CLIENT_SECRET
-        self.socket.curve_publickey = CLIENT_PUBLIC
-        self.socket.curve_serverkey = SERVER_PUBLIC
+        self.poller = zmq.Poller()
+        self.routes = {}   # socket -> (label, stream)
+        self._errors = {}  # label -> (last emitted at, failures since)
+
+    def subscribe(self, publisher_ip: str, port: str, stream, label: str):
+        """Connects a secure SUB socket and routes its messages to stream.handle()."""
+        socket = self.context.socket(zmq.SUB)
+        socket.curve_secretkey = CLIENT_SECRET
+        socket.curve_publickey = CLIENT_PUBLIC
+        socket.curve_serverkey = SERVER_PUBLIC
 
-        self.socket.connect(f"tcp://{publisher_ip}:{ZMQ_CAM_PORT}")
-        self.socket.setsockopt_string(zmq.SUBSCRIBE, "")
+        socket.connect(f"tcp://{publisher_ip}:{port}")
+        socket.setsockopt_string(zmq.SUBSCRIBE, "")
+        socket.setsockopt(zmq.LINGER, 0)
+
+        self.poller.register(socket, zmq.POLLIN)
+        self.routes[socket] = (label, stream)
 
     def run(self):
         while self.running:
             try:
-                if self.socket.poll(100) == 0:
-                    continue
-
-                msg_parts = self.socket.recv_multipart(flags=zmq.NOBLOCK)
-                if len(msg_parts) == 2:
-                    meta_dict = json.loads(msg_parts[0].decode('utf-8'))
-                    img_bytes = msg_parts[1]
-                    self.new_frame.emit(meta_dict, img_bytes)
-                    
-            except Exception as e:
-                self.error.emit(str(e))
+                ready = self.poller.poll(100)
+            except zmq.ZMQError as e:
+                self._report("poller", e)
+                continue
+
+            for socket, _ in ready:
+                label, stream = self.routes[socket]
+                for _ in range(self.MAX_BURST):
+                    try:
+                        msg_parts = socket.recv_multipart(flags=zmq.NOBLOCK)
+                    except zmq.Again:
+                        break
+                    try:
+                        stream.handle(msg_parts)
+                    except Exception as e:
+                        self._report(label, e)
+
+    def _report(self, label: str, exc: Exception):
+        """Emits the failure unless this stream already reported one in the last ERROR_LOG_S."""
+        now = time.monotonic()
+        last, count = self._errors.get(label, (-float("inf"), 0))
+        count += 1
+        if now - last < self.ERROR_LOG_S:
+            self._errors[label] = (last, count)
+            return
+
+        suffix = f" ({count - 1} more since last report)" if count > 1 else ""
+        self.error.emit(label, f"{exc}{suffix}")
+        self._errors[label] = (now, 0)
 
     def stop(self):
         self.running = False
         self.wait()
-        self.socket.close()
+        for socket in self.routes:
+            self.poller.unregister(socket)
+            socket.close()
         self.context.term()
 
-class LiveViewerWindow(QMainWindow):
-    """Main PyQt6 UI for visualizing telemetry."""
+# ── 3. User Interface ────────────────────────────────────────────────────────
+
+class NodePanel(QWidget):
+    """Radar, waterfall and camera panels for one streamer node."""
     def __init__(self, cfg: RadarConfig, publisher_ip: str):
         super().__init__()
         self.cfg = cfg
         self.publisher_ip = publisher_ip
-        
-        self.zoom_y = 1.0
-        self.zoom_x = 1.0
-
-        self.setWindowTitle(f"OST Live Telemetry | {self.publisher_ip} (Encrypted)")
-        self.setFixedSize(960, 400) 
-        self.setWindowIcon(QIcon(ICON_PATH))
-
-        self.setStyleSheet(f"""
-            QMainWindow {{ background-color: {COLOR_MAIN_BG}; }}
-            #CamFeed {{ background-color: transparent; border: none; }}
-        """)
+        self.radar = RadarStream(cfg)
+        self.camera = CameraStream()
 
         # Cache physical bounds for the radar axes
         self.max_range_val = min(int(MAX_RANGE / self.cfg.rangeRes), self.cfg.numRangeBins) * self.cfg.rangeRes
         self.dop_max = self.cfg.dopMax
-        
-        self._precompute_zoom() 
-        self._build_ui()
-        self._start_workers()
+        self.half_cell = self.dop_max / self.cfg.numLoops
 
-    def _precompute_zoom(self):
-        """Calculate interpolation factors to match the target smooth grid."""
-        src_rows = min(int(MAX_RANGE / self.cfg.rangeRes), self.cfg.numRangeBins)
-        src_cols = self.cfg.numLoops
-        self.zoom_y = max(SMOOTH_GRID, src_rows) / src_rows
-        self.zoom_x = max(SMOOTH_GRID, src_cols) / src_cols
+        self._rendered = {"radar": 0, "camera": 0}
+        self._rate_mark = (time.perf_counter(), {"radar": (0, 0), "camera": (0, 0)})
+        self._build_ui()
 
-    def _build_ui(self):
-        """Construct the horizontal dual-panel layout."""
-        central = QWidget()
-        self.setCentralWidget(central)
-        
-        main_layout = QHBoxLayout(central)
-        main_layout.setContentsMargins(10, 10, 10, 10) 
-        main_layout.setSpacing(10) 
-        
-        # Radar Panel
-        self.plot_radar = pg.PlotWidget()
-        self.plot_radar.setBackground(COLOR_MAIN_BG)
-        self.plot_radar.setTitle(None)
+    @staticmethod
+    def _make_plot(left: tuple[str, str], bottom: tuple[str, str]) -> pg.PlotWidget:
+        """Themed PlotWidget with (label, units) axes."""
+        plot = pg.PlotWidget()
+        plot.setBackground(COLOR_MAIN_BG)
+        plot.setTitle(None)
         
         # Format axes
         styles = {'color': COLOR_TEXT, 'font-size': '12px', 'font-family': 'Segoe UI'}
-        self.plot_radar.setLabel("left", "Range", units="m", **styles)
-        self.plot_radar.setLabel("bottom", "Velocity", units="m/s", **styles)
-        self.plot_radar.getPlotItem().hideAxis('top')
-        self.plot_radar.getPlotItem().hideAxis('right')
+        plot.setLabel("left", left[0], units=left[1], **styles)
+        plot.setLabel("bottom", bottom[0], units=bottom[1], **styles)
+        plot.getPlotItem().hideAxis('top')
+        plot.getPlotItem().hideAxis('right')
         
         pen = pg.mkPen(color=COLOR_TEXT, width=1)
-        self.plot_radar.getAxis('left').setPen(pen)
-        self.plot_radar.getAxis('left').setTextPen(COLOR_TEXT)
-        self.plot_radar.getAxis('bottom').setPen(pen)
-        self.plot_radar.getAxis('bottom').setTextPen(COLOR_TEXT)
-        self.plot_radar.showGrid(x=True, y=True, alpha=0.2) 
+        plot.getAxis('left').setPen(pen)
+        plot.getAxis('left').setTextPen(COLOR_TEXT)
+        plot.getAxis('bottom').setPen(pen)
+        plot.getAxis('bottom').setTextPen(COLOR_TEXT)
+        plot.showGrid(x=True, y=True, alpha=0.2) 
+        return plot
+
+    def _build_ui(self):
+        """Node header above the horizontal three-panel layout."""
+        outer = QVBoxLayout(self)
+        outer.setContentsMargins(0, 0, 0, 0)
+        outer.setSpacing(4)
+
+        self.lbl_header = QLabel(self.publisher_ip)
+        self.lbl_header.setObjectName("NodeHeader")
+        outer.addWidget(self.lbl_header)
+
+        main_layout = QHBoxLayout()
+        main_layout.setSpacing(10) 
+        outer.addLayout(main_layout, stretch=1)
+        
+        # Radar Panel
+        self.plot_radar = self._make_plot(("Range", "m"), ("Velocity", "m/s"))
         
         self.img_radar = pg.ImageItem()
         self.img_radar.setColorMap(pg.colormap.get(CMAP))
         self.plot_radar.addItem(self.img_radar)
+
+        # CFAR detections drawn as hollow rings on top of the heatmap
+        self.scatter_dets = pg.ScatterPlotItem(size=9, pen=pg.mkPen(COLOR_TEXT, width=1.5), brush=None)
+        self.plot_radar.addItem(self.scatter_dets)
         
         self.plot_radar.setXRange(-self.dop_max, self.dop_max, padding=0)
         self.plot_radar.setYRange(0, self.max_range_val, padding=0)
         main_layout.addWidget(self.plot_radar, stretch=1)
 
+        # Waterfall Panel (scrolling micro-Doppler, newest frame on the right)
+        self.plot_waterfall = self._make_plot(("Velocity", "m/s"), ("Time", "s"))
+        self.img_waterfall = pg.ImageItem()
+        self.img_waterfall.setColorMap(pg.colormap.get(CMAP))
+        self.plot_waterfall.addItem(self.img_waterfall)
+
+        self.txt_cadence = pg.TextItem("Cadence -- SPM", color=COLOR_TEXT, anchor=(0, 0))
+        self.txt_cadence.setPos(-WATERFALL_S, self.dop_max)
+        self.plot_waterfall.addItem(self.txt_cadence)
+        self.plot_waterfall.setXRange(-WATERFALL_S, 0, padding=0)
+        self.plot_waterfall.setYRange(-self.dop_max, self.dop_max, padding=0)
+        main_layout.addWidget(self.plot_waterfall, stretch=1)
+
         # Camera Panel
         self.lbl_cam_feed = QLabel()
         self.lbl_cam_feed.setObjectName("CamFeed") 
         self.lbl_cam_feed.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignHCenter)
         main_layout.addWidget(self.lbl_cam_feed, stretch=1)
 
-    def _start_workers(self):
-        """Boot background networking threads."""
-        self.w_radar = ZmqRadarWorker(self.cfg, self.publisher_ip, self.zoom_y, self.zoom_x)
-        self.w_radar.new_frame.connect(self._on_radar_frame)
-        self.w_radar.start()
-
-        self.w_cam = ZmqCameraWorker(self.publisher_ip)
-        self.w_cam.new_frame.connect(self._on_cam_frame)
-        self.w_cam.start()
-
-    def _on_radar_frame(self, smooth_matrix: np.ndarray, lo: float, hi: float):
+    def pull_frames(self):
+        """Renders whatever is newest in each mailbox; anything older was already dropped."""
+        frame = self.radar.mailbox.take()
+        if frame is not None:
+            self._on_radar_frame(frame)
+            self._rendered["radar"] += 1
+
+        self.camera.target_size = (self.lbl_cam_feed.width(), self.lbl_cam_feed.height())
+        cam = self.camera.mailbox.take()
+        if cam is not None:
+            self._on_cam_frame(*cam)
+            self._rendered["camera"] += 1
+
+    def update_stats(self):
+        """Shows receive vs render rate (and dropped frames) per stream in the node header."""
+        now = time.perf_counter()
+        t_prev, prev = self._rate_mark
+        dt = max(now - t_prev, 1e-6)
+
+        parts, mark = [], {}
+        for name, stream in (("Radar", self.radar), ("Camera", self.camera)):
+            received, _, dropped = stream.mailbox.stats()
+            rendered = self._rendered[name.lower()]
+            rx_prev, ui_prev = prev[name.lower()]
+            parts.append(f"{name} {(received - rx_prev) / dt:.0f}/{(rendered - ui_prev) / dt:.0f} FPS ({dropped} dropped)")
+            mark[name.lower()] = (received, rendered)
+
+        self._rate_mark = (now, mark)
+        self.lbl_header.setText(f"{self.publisher_ip} | RX/UI: " + " | ".join(parts))
+
+    def _on_radar_frame(self, frame: dict):
         """Render radar frame and enforce axis alignment bounds."""
-        self.img_radar.setImage(smooth_matrix, autoLevels=False, levels=(lo, hi))
+        self.img_radar.setImage(frame["heatmap"], autoLevels=False, levels=(0, 255))
+        # Doppler cells are centred on their bin velocity (DC at 0 m/s), hence the half-cell shift
         align_rect = pg.QtCore.QRectF(
-            -self.dop_max, 0, self.dop_max * 2.0, self.max_range_val
+            -self.dop_max - self.half_cell, 0, self.dop_max * 2.0, self.max_range_val
         )
         self.img_radar.setRect(align_rect)
 
-    def _on_cam_frame(self, meta: dict, img_bytes: bytes):
-        """Decode JPEG payload and update UI Pixmap."""
-        pixmap = QPixmap()
-        pixmap.loadFromData(img_bytes)
+        dets = frame["dets"]
+        self.scatter_dets.setData(x=dets[:, 1], y=dets[:, 0])
+
+        # Snapshot of the node's ring buffer (rows = velocity, newest frame on the right)
+        self.img_waterfall.setImage(self.radar.waterfall_snapshot(), autoLevels=False, levels=frame["wf_levels"])
+        self.img_waterfall.setRect(pg.QtCore.QRectF(-WATERFALL_S, -self.dop_max - self.half_cell, WATERFALL_S, self.dop_max * 2.0))
+
+        spm = frame["spm"]
+        self.txt_cadence.setText(f"Cadence {spm:.0f} SPM" if spm > 0 else "Cadence -- SPM")
+
+    def _on_cam_frame(self, meta: dict, image: QImage):
+        """Swap in the frame the hub already decoded and fitted to the panel."""
+        self.lbl_cam_feed.setPixmap(QPixmap.fromImage(image))
+
+class LiveViewerWindow(QMainWindow):
+    """Main PyQt6 UI for visualizing telemetry from one or more streamer nodes."""
+    NODE_W, NODE_H = 1400, 400
+
+    def __init__(self, cfg: RadarConfig, publisher_ips: list[str]):
+        super().__init__()
+        self.cfg = cfg
+        self.publisher_ips = publisher_ips
+        
+        self.setWindowTitle(f"OST Live Telemetry | {', '.join(self.publisher_ips)} (Encrypted)")
+        self.setWindowIcon(QIcon(ICON_PATH))
+
+        self.setStyleSheet(f"""
+            QMainWindow {{ background-color: {COLOR_MAIN_BG}; }}
+            #CamFeed {{ background-color: transparent; border: none; }}
+            #NodeHeader {{ color: {COLOR_TEXT}; font-family: 'Segoe UI'; font-size: 12px; }}
+        """)
+
+        self._build_ui()
+        self._start_workers()
+
+    def _build_ui(self):
+        """Grid of node panels: one column up to three nodes, two columns beyond that."""
+        central = QWidget()
+        self.setCentralWidget(central)
         
-        lbl_w = self.lbl_cam_feed.width()
-        lbl_h = self.lbl_cam_feed.height()
-        if lbl_w > 0 and lbl_h > 0:
-            self.lbl_cam_feed.setPixmap(pixmap.scaled(lbl_w, lbl_h, Qt.AspectRatioMode.KeepAspectRatio))
+        grid = QGridLayout(central)
+        grid.setContentsMargins(10, 10, 10, 10) 
+        grid.setSpacing(10) 
+
+        cols = 1 if len(self.publisher_ips) <= 3 else 2
+        rows = -(-len(self.publisher_ips) // cols)
+        self.panels = []
+        for i, ip in enumerate(self.publisher_ips):
+            panel = NodePanel(self.cfg, ip)
+            grid.addWidget(panel, i // cols, i % cols)
+            self.panels.append(panel)
+
+        if len(self.panels) == 1:
+            self.setFixedSize(self.NODE_W, self.NODE_H)
+        else:
+            self.resize(self.NODE_W * cols, self.NODE_H * rows)
+
+    def _start_workers(self):
+        """Boot the shared networking thread with two subscriptions per node."""
+        self.hub = ZmqHub()
+        self.hub.error.connect(self._on_hub_error)
+        for panel in self.panels:
+            self.hub.subscribe(panel.publisher_ip, ZMQ_RADAR_PORT, panel.radar, f"{panel.publisher_ip} radar")
+            self.hub.subscribe(panel.publisher_ip, ZMQ_CAM_PORT, panel.camera, f"{panel.publisher_ip} camera")
+        self.hub.start()
+
+        # The UI pulls the newest frames at most UI_FPS times a second, whatever the network does
+        self.ui_timer = QTimer(self)
+        self.ui_timer.timeout.connect(self._pull_frames)
+        self.ui_timer.start(max(1, int(1000 / UI_FPS)))
+
+        self.stats_timer = QTimer(self)
+        self.stats_timer.timeout.connect(self._update_stats)
+        self.stats_timer.start(1000)
+
+    def _on_hub_error(self, label: str, message: str):
+        """Hub errors arrive already rate-limited per stream; label is "<ip> radar/camera"."""
+        log.error(f"Stream error from {label}: {message}")
+
+    def _pull_frames(self):
+        for panel in self.panels:
+            panel.pull_frames()
+
+    def _update_stats(self):
+        for panel in self.panels:
+            panel.update_stats()
 
     def closeEvent(self, event):
         """Terminate networking safely before UI closes."""
         log.info("Shutting Down...")
-        self.w_radar.stop()
-        self.w_cam.stop()
+        self.ui_timer.stop()
+        self.stats_timer.stop()
+        self.hub.stop()
         event.accept()
 
+def parse_endpoints(text: str) -> list[str]:
+    """Comma-separated publisher IPs -> unique list, in the order given."""
+    ips = [ip.strip() for ip in text.split(',') if ip.strip()]
+    return list(dict.fromkeys(ips))
+
 def main():
     print("\n*******************************")
     print(f"****** OST VIEWER {APP_VERSION} ******")
     print("*******************************")
-    ip_input = input(f"\nEnter Stream IP. Leave blank for localhost: ").strip()
-    ip = VIEW_IP if not ip_input else ip_input
+    ip_input = input(f"\nEnter Stream IP(s), comma-separated. Leave blank for {VIEW_IP}: ").strip()
+    ips = parse_endpoints(ip_input or VIEW_IP)
             
     app = QApplication.instance() or QApplication(sys.argv)
     pg.setConfigOptions(imageAxisOrder="row-major", antialias=True)
     
     try:
         cfg = RadarConfig(HW_CFG_FILE)
-        window = LiveViewerWindow(cfg, ip)
+        window = LiveViewerWindow(cfg, ips)
         window.show()
         app.exec()
     except Exception as e: